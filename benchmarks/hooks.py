@@ -0,0 +1,46 @@
+# Microbenchmark of the per-agent cost of hook dispatch in model.step()
+# Compares the compiled dispatch table against the previous implementation of doHooks(),
+# which checked membership and recursed through fallback lists on every call.
+# Run with `python benchmarks/hooks.py` from the repository root.
+
+import sys, os, timeit
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from helipad import Helipad
+
+AGENTS = 10000
+PERIODS = 20
+
+#The implementation of Helipad.doHooks() prior to the dispatch table, for comparison
+def legacyDoHooks(self, place, args):
+	if isinstance(place, (list, tuple)):
+		for f in place:
+			r = legacyDoHooks(self, f, args)
+			if r is not None: return r
+		return None
+
+	if place not in self.hooks: return None
+	for f in self.hooks[place]: r = f(*args)
+	return r
+
+def setup(hooked: bool):
+	heli = Helipad()
+	heli.param('num_agent', AGENTS)
+	if hooked:
+		@heli.hook
+		def agentStep(agent, model, stage): pass
+	heli.setup()
+	return heli
+
+def bench(hooked: bool, legacy: bool) -> float:
+	"""Nanoseconds per agent per period."""
+	heli = setup(hooked)
+	if legacy: heli.doHooks = legacyDoHooks.__get__(heli)
+	secs = min(timeit.repeat(heli.step, number=PERIODS, repeat=5))
+	return secs / PERIODS / AGENTS * 1e9
+
+if __name__ == '__main__':
+	print(f'{AGENTS} agents, {PERIODS} periods. Time per agent step:')
+	for hooked in (False, True):
+		before, after = bench(hooked, True), bench(hooked, False)
+		label = 'One agentStep hook' if hooked else 'No hooks registered'
+		print(f'{label:>20}: {before:7.0f} ns before, {after:7.0f} ns after ({before/after:.2f}×)')
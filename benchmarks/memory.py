@@ -0,0 +1,55 @@
+# Benchmark of the memory taken by each agent in a large model
+# Compares the default Agent class, which keeps user attributes in a per-object dict, with a subclass declaring them in
+# __slots__, and with a subclass storing them in columns instead (see Agents.useColumns()).
+# Bytes are counted with tracemalloc as the population grows from 1 to N, after one period has run.
+# Run with `python benchmarks/memory.py [N]` from the repository root.
+
+import sys, os, gc, tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from helipad import Helipad, Agent, baseAgent
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+class CompactAgent(baseAgent):
+	__slots__ = ('wealth', 'propensity')
+
+class ColumnarAgent(baseAgent):
+	__slots__ = ()
+
+def build(class_, columns=None) -> Helipad:
+	heli = Helipad()
+	heli.agents.removePrimitive('agent')
+	heli.agents.addPrimitive('agent', class_, dflt=1, columns=columns)
+	heli.goods.add('cash', 'green', endowment=10, money=True)
+	heli.goods.add('jam', 'red', endowment=1)
+
+	@heli.hook
+	def agentInit(agent, model):
+		agent.wealth = model.random.random()
+		agent.propensity = 0.5
+
+	@heli.hook
+	def agentStep(agent, model, stage):
+		agent.wealth *= 1.01
+
+	return heli
+
+def perAgent(heli: Helipad) -> float:
+	heli.setup()
+	gc.collect()
+	tracemalloc.start()
+	heli.param('num_agent', N)
+	heli.step()
+	gc.collect()
+	used = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return used/(N-1)
+
+if __name__ == '__main__':
+	print(f'Bytes per agent with {N:,} agents:')
+	for label, class_, columns in [
+		('Agent (attributes in a dict)', Agent, None),
+		('Subclass with __slots__', CompactAgent, None),
+		('Columns', ColumnarAgent, {'wealth': float, 'propensity': float, 'utils': float, 'age': int})
+	]:
+		print(f'{label:>30}: {perAgent(build(class_, columns)):8.0f}')
@@ -0,0 +1,40 @@
+# Benchmark of the cost of starting a headless model, as a parameter sweep worker does
+# Each measurement runs in a fresh interpreter, so nothing is cached from a previous import.
+# Reports the time to import Helipad, to construct the first and subsequent models, and to set one up,
+# and lists any GUI or plotting libraries that were imported along the way (there should be none).
+# Run with `python benchmarks/startup.py` from the repository root.
+
+import sys, os, subprocess, json, statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+REPEAT = 5
+HEAVY = ['matplotlib', 'pandas', 'networkx', 'tkinter', 'ipywidgets', 'asyncio', 'scipy']
+
+SCRIPT = '''
+import sys, time, json
+t0 = time.perf_counter()
+from helipad import Helipad
+t1 = time.perf_counter()
+heli = Helipad()
+t2 = time.perf_counter()
+for i in range(10): Helipad()
+t3 = time.perf_counter()
+heli.setup()
+t4 = time.perf_counter()
+print(json.dumps({'import': t1-t0, 'first': t2-t1, 'next': (t3-t2)/10, 'setup': t4-t3, 'loaded': [m for m in %r if m in sys.modules]}))
+''' % HEAVY
+
+def sample(checkUpdates: bool) -> dict:
+	env = dict(os.environ, PYTHONPATH=ROOT)
+	if not checkUpdates: env['HELIPAD_NO_UPDATE_CHECK'] = '1'
+	else: env.pop('HELIPAD_NO_UPDATE_CHECK', None)
+	out = subprocess.run([sys.executable, '-c', SCRIPT], env=env, capture_output=True, text=True, check=True).stdout
+	return json.loads(out.strip().splitlines()[-1])
+
+if __name__ == '__main__':
+	for checkUpdates in (False, True):
+		runs = [sample(checkUpdates) for i in range(REPEAT)]
+		print('With the PyPI update check:' if checkUpdates else 'Without the PyPI update check:')
+		for k in ['import', 'first', 'next', 'setup']:
+			print(f'{k:>8}: {statistics.median(r[k] for r in runs)*1000:8.1f} ms')
+		print(f'  loaded: {", ".join(runs[0]["loaded"]) or "none"}')
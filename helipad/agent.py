@@ -2,13 +2,17 @@
 The `Agent` class and the `Agents` container. This module can be imported to extend `baseAgent` to create new primitives.
 """
 
-import warnings
-from random import choice, randint, shuffle
+import warnings, types, os, gc, weakref
 from math import degrees, radians, pi
 import numpy as np
-import pandas
+from functools import cache
 from helipad.helpers import ï, funcStore, Color, Item, isNotebook
 
+@cache
+def primHooks(prim: str, verb: str) -> tuple:
+	"""The names of the hooks that fire for `verb` on all primitives and on `prim` specifically, e.g. `('baseAgentStep', 'agentStep')`. Cached, so hot paths resolve the pair once per primitive rather than building it on every call."""
+	return ('baseAgent'+verb, prim+verb)
+
 #Basic agent functions. This class should not be instantiated directly; instead it should be
 #subclassed by a class corresponding to a primitive and registered with Helipad.addPrimitive().
 #See below, the Agent() class for a minimal example.
@@ -19,6 +23,10 @@ class baseAgent:
 	overdraft: str = 'continue-silent'
 	primitive: str = ''
 
+	#Built-in properties are stored in slots rather than a per-object dict. Subclasses get a dict for any other attributes
+	#as usual, unless they declare them in their own __slots__, which takes substantially less memory in large models.
+	__slots__ = ('_breed', 'id', 'model', 'age', 'dead', 'stocks', 'utils', 'position', 'rads', '_edges', '_demand', '_columns', '_row', '__weakref__')
+
 	#==================
 	# BASIC METHODS
 	#==================
@@ -27,26 +35,65 @@ class baseAgent:
 		self.breed = breed
 		self.id: int = int(aId)
 		self.model = model
+		self._columns = None
+		if (prim := model.agents.get(self.primitive)) is not None: #Agents of unregistered classes aren't tracked
+			model.agents.register(self)
+			prim.columns.alloc(self) #Before any columnar properties are set
 		self.age: int = 0
 		self.dead: bool = False
-		self.stocks = Stocks(breed, model.goods)
-		self.edges = Edges(self)
+		self.stocks = Stocks(breed, model.goods, self)
+		self._edges = None
+		self._demand = None
 		self.utils = 0
 		if not hasattr(self, 'position'): self.position = None #Overridden in spatial init
-		self.currentDemand = {g:0 for g in model.goods.keys()}
 		self.rads = 0
 
 		#For multi-level models
 		#Has to be a static property since we're checking as the object initializes
 		if hasattr(super(), 'runInit'): super().__init__()
 
-		self.model.doHooks(['baseAgentInit', self.primitive+'Init'], [self, self.model])
+		self.model.doHooks(primHooks(self.primitive, 'Init'), [self, self.model])
 
 	def __repr__(self): return f'<{self.__class__.__name__} {self.id}>'
 
+	@property
+	def breed(self) -> str:
+		"""The agent's breed. Changing it moves the agent to the new breed's index in its primitive. https://helipad.dev/functions/baseagent/#breed"""
+		return self._breed
+
+	@breed.setter
+	def breed(self, val: str):
+		old = getattr(self, '_breed', None)
+		self._breed = val
+		if old is not None and old!=val and (prim := self.model.agents.get(self.primitive)) is not None: prim.rebreed(self, old)
+
+	#Most agents in a large model never trade or connect, so these are created on first use
+	@property
+	def edges(self) -> 'Edges':
+		"""The agent's network connections, organized by kind. https://helipad.dev/functions/baseagent/#edges"""
+		if self._edges is None: self._edges = Edges(self)
+		return self._edges
+
+	@edges.setter
+	def edges(self, val): self._edges = val
+
+	@property
+	def currentDemand(self) -> 'Demand|dict':
+		"""The agent's demand for each good in the current period. https://helipad.dev/functions/baseagent/#currentdemand"""
+		if self._demand is None:
+			self._demand = Demand(self) if self._columns is not None and 'demand' in self._columns else {g:0 for g in self.model.goods}
+		return self._demand
+
+	@currentDemand.setter
+	def currentDemand(self, val: dict):
+		demand = self.currentDemand
+		for g in list(demand): #Replace rather than merge, keeping the model's totals in step
+			if g not in val: demand[g] = 0
+		for g,v in val.items(): demand[g] = v
+
 	def step(self, stage: int):
 		"""Runs for each agent in each period and increments the agent's age by 1. Should not be called directly, but should be hooked using `agentStep` or `baseAgentStep`. https://helipad.dev/functions/baseagent/step/"""
-		self.model.doHooks(['baseAgentStep', self.primitive+'Step'], [self, self.model, stage])
+		self.model.doHooks(primHooks(self.primitive, 'Step'), [self, self.model, stage])
 		if hasattr(super(), 'runInit'): super().step(stage) #For multi-level models
 		if stage == self.model.stages: self.age += 1
 
@@ -60,32 +107,34 @@ class baseAgent:
 		self.model.doHooks('preTrade', [self, partner, good1, amt1, good2, amt2])
 
 		#Budget constraints. Hold price constant if hit
+		#Messages are only composed if they'll be seen, since translating them is slow
 		message = None
-		prim1, prim2 = self.primitive.title(), partner.primitive.title()
 		if amt2 != 0: price = amt1 / amt2
 		if self.overdraft != 'allow':
+			quiet = self.overdraft.endswith('silent')
+			def short(giver, receiver, good, stock):
+				msg = '' if quiet else ï('{0} {1} does not have sufficient {2} to give {3} {4}.').format(giver.primitive.title(), giver.id, good, receiver.primitive.title(), receiver.id)
+				if 'continue' in self.overdraft and not quiet: msg += ï(' Continuing with available {0} of {1}…').format(good, stock)
+				return msg
+
 			if amt1 > self.stocks[good1]:
-				message = ï('{0} {1} does not have sufficient {2} to give {3} {4}.').format(prim1, self.id, good1, prim2, partner.id)
+				message = short(self, partner, good1, self.stocks[good1])
 				if 'continue' in self.overdraft:
-					message += ï(' Continuing with available {0} of {1}…').format(good1, self.stocks[good1])
 					amt1 = self.stocks[good1]
 					if amt2 != 0: amt2 = amt1 / price
 			elif -amt1 > partner.stocks[good1]:
-				message = ï('{0} {1} does not have sufficient {2} to give {3} {4}.').format(prim2, partner.id, good1, prim1, self.id)
+				message = short(partner, self, good1, partner.stocks[good1])
 				if 'continue' in self.overdraft:
-					message += ï(' Continuing with available {0} of {1}…').format(good1, partner.stocks[good1])
 					amt1 = -partner.stocks[good1]
 					if amt2 != 0: amt2 = amt1 / price
 			if amt2 > partner.stocks[good2]:
-				message = ï('{0} {1} does not have sufficient {2} to give {3} {4}.').format(prim2, partner.id, good2, prim1, self.id)
+				message = short(partner, self, good2, partner.stocks[good2])
 				if 'continue' in self.overdraft:
-					message += ï(' Continuing with available {0} of {1}…').format(good2, partner.stocks[good2])
 					amt2 = partner.stocks[good2]
 					amt1 = price * amt2
 			elif -amt2 > self.stocks[good2]:
-				message = ï('{0} {1} does not have sufficient {2} to give {3} {4}.').format(prim1, self.id, good2, prim2, partner.id)
+				message = short(self, partner, good2, self.stocks[good2])
 				if 'continue' in self.overdraft:
-					message += ï(' Continuing with available {0} of {1}…').format(good2, self.stocks[good2])
 					amt2 = -self.stocks[good2]
 					amt1 = price * amt2
 
@@ -93,7 +142,7 @@ class baseAgent:
 				if self.overdraft == 'stop': raise ValueError(message)
 				if 'fail' in self.overdraft:
 					go = False
-					message += ï(' Cancelling trade…')
+					if not quiet: message += ï(' Cancelling trade…')
 				elif 'warn' in self.overdraft: warnings.warn(message, None, 2)
 
 		if go:
@@ -122,40 +171,41 @@ class baseAgent:
 
 	def pay(self, recipient, amount):
 		"""Unilaterally transfer `amount` of the monetary good to `recipient`, or from `recipient` to the agent if `amount<0`. Returns the amount actually paid, which will be equal to `amount` unless the agent's budget constraint is hit. https://helipad.dev/functions/baseagent/pay/"""
-		if self.model.goods.money is None: raise RuntimeError(ï('{} requires a monetary good to be specified.').format('Agent.pay()'))
+		if (money := self.model.goods.money) is None: raise RuntimeError(ï('{} requires a monetary good to be specified.').format('Agent.pay()'))
 		go = True
 
 		#Do hooks before budget constraints
 		amount_ = self.model.doHooks('pay', [self, recipient, amount, self.model])
 		if amount_ is not None: amount = amount_
 
-		#Budget constraints
-		prim1, prim2 = self.primitive.title(), recipient.primitive.title()
+		#Budget constraints. Messages are only composed if they'll be seen
 		message = None
 		if self.overdraft != 'allow':
-			if amount > self.balance:
-				message = ï('{0} {1} does not have sufficient funds to pay {2} {3}.').format(prim1, self.id, prim2, recipient.id)
+			quiet = self.overdraft.endswith('silent')
+			def short(payer, payee, balance):
+				msg = '' if quiet else ï('{0} {1} does not have sufficient funds to pay {2} {3}.').format(payer.primitive.title(), payer.id, payee.primitive.title(), payee.id)
+				if 'continue' in self.overdraft and not quiet: msg += ï(' Continuing with available balance of {}…').format(balance)
+				return msg
+
+			if amount > (balance := self.balance):
+				message = short(self, recipient, balance)
 				if self.overdraft == 'stop': raise ValueError(message)
-				if 'continue' in self.overdraft:
-					amount = self.balance
-					message += ï(' Continuing with available balance of {}…').format(self.balance)
-			elif -amount > recipient.balance:
-				message = ï('{0} {1} does not have sufficient funds to pay {2} {3}.').format(prim2, recipient.id, prim1, self.id)
-				if 'continue' in self.overdraft:
-					amount = -recipient.balance
-					message += ï(' Continuing with available balance of {}…').format(recipient.balance)
+				if 'continue' in self.overdraft: amount = balance
+			elif -amount > (balance := recipient.balance):
+				message = short(recipient, self, balance)
+				if 'continue' in self.overdraft: amount = -balance
 
 			if message is not None:
 				if self.overdraft == 'stop': raise ValueError(message)
 				if 'fail' in self.overdraft:
 					go = False
-					message += ï(' Cancelling trade…')
+					if not quiet: message += ï(' Cancelling trade…')
 				if 'warn' in self.overdraft:
 					warnings.warn(message, None, 2)
 
 		if go and amount:
-			recipient.stocks[self.model.goods.money] += amount
-			self.stocks[self.model.goods.money] -= amount
+			recipient.stocks[money] += amount
+			self.stocks[money] -= amount
 			return amount
 		else: return 0
 
@@ -183,10 +233,7 @@ class baseAgent:
 		https://helipad.dev/functions/baseagent/reproduce/"""
 		if self.fixed: raise NotImplementedError(ï('Fixed primitives cannot reproduce.'))
 
-		maxid = 0
-		for a in self.model.agents.all:
-			maxid = max(maxid, a.id)
-		newagent = type(self)(self.breed, maxid+1, self.model)
+		newagent = type(self)(self.breed, self.model.agents.nextId(), self.model)
 
 		parents = [self] + partners
 		for a in inherit:
@@ -204,7 +251,7 @@ class baseAgent:
 			elif stat=='gmean': n = np.exp(np.log(v).sum()/len(v))
 			elif stat=='first': n = v[0]
 			elif stat=='last': n = v[-1]
-			elif stat in ('rand', 'random'): n = choice(v)
+			elif stat in ('rand', 'random'): n = self.model.random.choice(v)
 			elif stat=='max': n = max(v)
 			elif stat=='min': n = min(v)
 			elif callable(stat): n = stat(v)
@@ -219,24 +266,24 @@ class baseAgent:
 				if isinstance(v, tuple): v, scale = v
 				else: scale = 'linear'
 
-				if scale=='log': newval = np.random.lognormal(np.log(getattr(newagent, k)), v)
-				else: newval = np.random.normal(getattr(newagent, k), v)
+				if scale=='log': newval = self.model.rng.lognormal(np.log(getattr(newagent, k)), v)
+				else: newval = self.model.rng.normal(getattr(newagent, k), v)
 			setattr(newagent, k, newval)
 
-		newagent.id = maxid+1
 		for p in parents:
 			p.edges.add(newagent,'lineage', True) #Keep track of parent-child relationships
 		self.model.birthqueue.append(newagent)
 
-		self.model.doHooks(['baseAgentReproduce', self.primitive+'Reproduce'], [parents, newagent, self.model])
+		self.model.doHooks(primHooks(self.primitive, 'Reproduce'), [parents, newagent, self.model])
 		return newagent
 
 	def die(self, updateGUI: bool=True):
 		"""Remove the agent from the model's list of active agents and cut the agent's edges. https://helipad.dev/functions/baseagent/die/"""
 		if self.fixed: raise NotImplementedError(ï('Fixed primitives cannot die.'))
-		for edge in self.edges.all: edge.cut()
+		if self._edges is not None:
+			for edge in self._edges.all: edge.cut()
 		self.dead = True
-		self.model.doHooks(['baseAgentDie', self.primitive+'Die'], [self])
+		self.model.doHooks(primHooks(self.primitive, 'Die'), [self])
 		# Model will queue removal of dead agents at the end of each period
 
 	@property
@@ -313,12 +360,23 @@ class baseAgent:
 		if self.position is not None: return self.model.patches.at(*self.position)
 
 	def transfer(self, dest) -> None:
-		"""In a multi-level model, move the agent to a different instance of `MultiLevel` or the top-level model."""
+		"""In a multi-level model, move the agent to a different instance of `MultiLevel` or the top-level model. The agent takes a new ID if its own is already in use in `dest`."""
 		origin = self.model
-		dest.agents[self.primitive].append(self)
+		if self in origin.birthqueue: origin.birthqueue.remove(self) #Born this period and not yet in the list
+		else: origin.agents[self.primitive].remove(self)
+		origin.agents.unregister(self)
+		origin.agents[self.primitive].columns.release(self)
+		origin.agents[self.primitive].columns.compact()
+		if self.id in dest.agents.index: self.id = dest.agents.nextId() #Each model issues its own IDs
 		self.model = dest
-		origin.agents[self.primitive].remove(self)
-		self.model.doHooks(['baseAgentMove', self.primitive+'Move'], [self, origin, dest])
+		dest.agents[self.primitive].append(self)
+		dest.agents.register(self)
+		dest.agents[self.primitive].columns.adopt(self)
+		if self._edges is not None:
+			for e in self._edges.all:
+				dest.agents.edges.register(e)
+				if all(v.model is not origin for v in e.vertices): origin.agents.edges.unregister(e)
+		self.model.doHooks(primHooks(self.primitive, 'Move'), [self, origin, dest])
 
 #The default agent class corresponding to the 'agent' primitive.
 class Agent(baseAgent):
@@ -337,10 +395,23 @@ class Patch(baseAgent):
 			for a in self.agentsOn: a.die()
 		self.model.doHooks(['baseAgentDie', 'PatchDie'], [self])
 
+	#Neighboring patches cache their lists of live neighbors, so let them know when this one dies or is revived
+	@property
+	def dead(self) -> bool: return baseAgent.dead.__get__(self)
+
+	@dead.setter
+	def dead(self, val: bool):
+		baseAgent.dead.__set__(self, val)
+		if (edges := getattr(self, '_edges', None)) is not None:
+			for p in edges.outbound('space', True, obj='agent'): p.edges.invalidate('space')
+
 	@property
 	def neighbors(self) -> list:
-		"""A list of adjacent patches. Corner-adjacent patches will be included depending on the value of the `corners` parameter of `model.spatial()`. https://helipad.dev/functions/patch/#neighbors"""
-		return [p for p in self.edges.outbound('space', True, obj='agent') if not p.dead]
+		"""A list of adjacent patches. Corner-adjacent patches will be included depending on the value of the `corners` parameter of `model.spatial()`. The list is cached until the patch network changes, and should not be modified. https://helipad.dev/functions/patch/#neighbors"""
+		cache = self.edges.cache.setdefault('space', {})
+		if (n := cache.get('neighbors')) is None:
+			n = cache['neighbors'] = [p for p in self.edges.outbound('space', True, obj='agent') if not p.dead]
+		return n
 
 	def __repr__(self):
 		if self.model.patches.geometry == 'geo' and self.name: return f'<Patch {self.name}>'
@@ -351,6 +422,8 @@ class Patch(baseAgent):
 #or a boolean (False for undirected, True for agent1 to agent2)
 class Edge:
 	"""A connection between two agents as part of a network. https://helipad.dev/functions/edge/"""
+	__slots__ = ('active', 'kind', 'vertices', 'weight', 'directed', 'startpoint', 'endpoint', '__dict__', '__weakref__')
+
 	def __init__(self, agent1: baseAgent, agent2: baseAgent, kind: str='edge', direction=None, weight=1) -> None:
 		self.active: bool = True
 		self.kind = kind
@@ -375,9 +448,13 @@ class Edge:
 			self.endpoint, self.startpoint, self.directed = (None, None, False)
 
 		#Add object to each agent, and to the model
-		for agent in self.vertices:
-			if kind not in agent.edges: agent.edges[kind] = []
-			if self not in agent.edges[kind]: agent.edges[kind].append(self) #Don't add self-links twice
+		for agent in (self.vertices if agent1 is not agent2 else (agent1,)): #Don't add self-links twice
+			edges = agent.edges
+			if kind in edges: edges[kind].append(self)
+			else: edges[kind] = [self]
+			edges.invalidate(kind)
+		agent1.model.agents.edges.register(self)
+		if agent2.model is not agent1.model: agent2.model.agents.edges.register(self)
 
 		agent1.model.doHooks('edgeInit', [self, kind, agent1, agent2])
 
@@ -389,6 +466,8 @@ class Edge:
 		"""Break the connection between the two agents represented by the edge and remove the `Edge` object from the `edges` property of both agents. https://helipad.dev/functions/edge/cut/"""
 		for agent in self.vertices:
 			if self in agent.edges[self.kind]: agent.edges[self.kind].remove(self) #Remove from agents
+			agent.edges.invalidate(self.kind)
+			agent.model.agents.edges.unregister(self)
 		self.active = False
 		self.vertices[0].model.doHooks('edgeCut', [self])
 
@@ -400,49 +479,116 @@ class Edge:
 
 	def reassign(self, oldagent: baseAgent, newagent: baseAgent):
 		"""Moves a vertex from `oldagent` to `newagent`. https://helipad.dev/functions/edge/reassign/"""
-		self.vertices = (self.partner(oldagent), newagent)
+		partner = self.partner(oldagent)
+		self.vertices = (partner, newagent)
+		if self.directed:
+			if self.startpoint is oldagent: self.startpoint = newagent
+			else: self.endpoint = newagent
 		oldagent.edges[self.kind].remove(self)
+		if self.kind not in newagent.edges: newagent.edges[self.kind] = []
 		newagent.edges[self.kind].append(self)
+		for a in (oldagent, newagent, partner): a.edges.invalidate(self.kind)
 		newagent.model.doHooks('edgeReassign', [self, oldagent, newagent])
 
 class Stocks:
-	"A dict-like interface for agent holdings of registered goods. https://helipad.dev/functions/baseagent/#stocks"
-	def __init__(self, breed: str, goodslist: list):
-		self.goods = {g:{} for g in goodslist}
+	"A dict-like interface for agent holdings of registered goods. Quantities are stored as floats in a row of the primitive's holdings matrix, `Primitive.columns['stocks']`, and returned as ints when whole; other properties of goods are stored on the object. `stocks[good, True]` returns a read-only view of all of a good's properties; set them with `stocks[good, prop]`. https://helipad.dev/functions/baseagent/#stocks"
+	__slots__ = ('props', 'm', 'row', 'index')
+
+	def __init__(self, breed: str, goodslist: list, agent=None):
+		self.props = None #Only created for goods with properties other than quantity
+		quantities = {}
 		for good, ginfo in goodslist.items():
 			for p, fn in ginfo.props.items():
 				endow = fn(breed) if callable(fn) else fn
-				if endow is None: self.goods[good][p] = 0
-				elif isinstance(endow, (tuple, list)): self.goods[good][p] = randint(*endow)
-				else: self.goods[good][p] = endow
+				if endow is None: endow = 0
+				elif isinstance(endow, (tuple, list)): endow = goodslist.model.random.randint(*endow)
+				if p=='quantity': quantities[good] = endow
+				else: self.setProp(good, p, endow)
+
+		if agent is not None and agent._columns is not None and 'stocks' in agent._columns: self.attach(agent._columns, agent._row, quantities)
+		else: self.detach(quantities)
+
+	#self.m is the primitive's holdings matrix, or a private one-row matrix, and self.index the column of each good within it.
+	#A reference to the matrix and the agent's row number take much less memory than a NumPy view of the row.
+	def attach(self, cols, row: int, quantities: dict|None=None):
+		"""Move the agent's holdings into row `row` of a `Columns` object."""
+		if quantities is None: quantities = dict(self.items())
+		self.m, self.row, self.index = cols.data['stocks'], row, cols.goods
+		for g,q in quantities.items():
+			if g in self.index: self.m[row, self.index[g]] = q
+
+	def detach(self, quantities: dict|None=None):
+		"""Move the agent's holdings out of the primitive's holdings matrix and onto the object."""
+		if quantities is None: quantities = dict(self.items())
+		self.index = {g:i for i,g in enumerate(quantities)}
+		self.m, self.row = np.array([list(quantities.values())], dtype=float).reshape(1, len(quantities)), 0
+
+	#Don't pickle the whole matrix along with each agent
+	def __getstate__(self): return {'props': self.props, 'quantities': dict(self.items())}
+	def __setstate__(self, state):
+		self.props = state['props']
+		self.detach(state['quantities'])
 
 	def __getitem__(self, key: str):
-		if isinstance(key, str): return self.goods[key]['quantity']
+		if isinstance(key, str):
+			v = self.m.item(self.row, self.index[key])
+			return int(v) if v.is_integer() else v #Holdings are stored as floats, but whole quantities are returned as ints
 		elif isinstance(key, tuple):
-			if isinstance(key[1], str): return self.goods[key[0]][key[1]]
-			elif key[1] is True: return self.goods[key[0]]
-			elif key[1] is False: return self.goods[key]['quantity']
+			if key[1]=='quantity' or key[1] is False: return self[key[0]]
+			elif isinstance(key[1], str): return (self.props or {})[key[0]][key[1]]
+			elif key[1] is True: return types.MappingProxyType({**(self.props or {}).get(key[0], {}), 'quantity': self[key[0]]})
 		raise KeyError
 
 	def __setitem__(self, key: str, val):
-		if isinstance(key, str): self.goods[key]['quantity'] = val
-		elif isinstance(key, tuple) and isinstance(key[1], str): self.goods[key[0]][key[1]] = val
+		if isinstance(key, str): self.m[self.row, self.index[key]] = val
+		elif isinstance(key, tuple) and isinstance(key[1], str):
+			if key[1]=='quantity': self[key[0]] = val
+			else: self.setProp(key[0], key[1], val)
 		else: raise KeyError
 
-	def __repr__(self): return {k: g['quantity'] for k,g in self.goods.items()}.__repr__()
-	def __iter__(self): return iter({k: g['quantity'] for k,g in self.goods.items()})
-	def __next__(self): return next({k: g['quantity'] for k,g in self.goods.items()})
-	def __len__(self): return len(self.goods)
-	def keys(self): return self.goods.keys()
-	def values(self): return [g['quantity'] for g in self.goods.values()]
-	def items(self): return [(k, g['quantity']) for k,g in self.goods.items()]
+	def setProp(self, good: str, prop: str, val):
+		if self.props is None: self.props = {}
+		self.props.setdefault(good, {})[prop] = val
+
+	def __repr__(self): return dict(self.items()).__repr__()
+	def __iter__(self): return iter(self.index)
+	def __len__(self): return len(self.index)
+	def keys(self): return self.index.keys()
+	def values(self): return [int(v) if v.is_integer() else v for v in self.m[self.row].tolist()]
+	def items(self): return list(zip(self.index, self.values()))
 
 #==================
 # CONTAINER CLASSES
 #==================
 
+class Demand:
+	"""A dict-like view of an agent's demand for each good in the current period, stored in a row of the primitive's demand matrix, `Primitive.columns['demand']`. Changes are added to the model's running totals in `model.goods.demand`. https://helipad.dev/functions/baseagent/#currentdemand"""
+	__slots__ = ('agent',)
+
+	def __init__(self, agent: baseAgent): self.agent = agent
+
+	def __getitem__(self, good: str):
+		a = self.agent
+		v = a._columns.data['demand'].item(a._row, a._columns.goods[good])
+		return int(v) if v.is_integer() else v
+
+	def __setitem__(self, good: str, val):
+		a = self.agent
+		m, i = a._columns.data['demand'], a._columns.goods[good]
+		a.model.goods.demand[good] += val - m.item(a._row, i)
+		m[a._row, i] = val
+
+	def __repr__(self): return dict(self.items()).__repr__()
+	def __iter__(self): return iter(self.agent._columns.goods)
+	def __len__(self): return len(self.agent._columns.goods)
+	def keys(self): return self.agent._columns.goods.keys()
+	def values(self): return [self[g] for g in self]
+	def items(self): return [(g, self[g]) for g in self]
+
 class MultiDict(dict):
 	"""A base class for a dict of dicts"""
+	__slots__ = ()
+
 	def __len__(self):
 		return sum(len(a) for a in super().values())
 
@@ -459,22 +605,43 @@ class Agents(MultiDict):
 		self.model = model
 		self.order = 'linear'
 		self.edges = ModelEdges(self)
+		self.index = {} #Agents by ID
+		self.lastId = 0
 		super().__init__()
 
 	#Allow retrieval by either primitive or agent ID
 	def __getitem__(self, val:str|int) -> baseAgent|list[baseAgent]|None:
-		if isinstance(val, int):
-			for p in super().values():
-				for a in p:
-					if a.id==val: return a
+		if isinstance(val, int): return self.index.get(val)
 		else: return super().__getitem__(val)
 
 	def __contains__(self, val) -> bool:
-		if isinstance(val, int): return self[val]
+		if isinstance(val, int): return val in self.index
 		else: return super().__contains__(val)
 
-	def addPrimitive(self, name: str, class_, plural=None, dflt=50, low=1, high=100, step=1, hidden: bool=False, priority: int=100, order=None):
-		"""Register an agent primitive. https://helipad.dev/functions/agents/addprimitive/"""
+	def nextId(self) -> int:
+		"""Reserve a new agent ID, greater than any issued since the model was set up. IDs are not reused after an agent dies. https://helipad.dev/functions/agents/nextid/"""
+		self.lastId += 1
+		return self.lastId
+
+	#Keep the ID index in sync with the agent lists. Called on creation, transfer, and removal of dead agents.
+	def register(self, agent: baseAgent) -> None:
+		self.index[agent.id] = agent
+		if agent.id > self.lastId: self.lastId = agent.id
+
+	def unregister(self, agent: baseAgent) -> None:
+		if self.index.get(agent.id) is agent: del self.index[agent.id]
+
+	def reset(self) -> None:
+		"""Remove all agents and restart the ID counter. https://helipad.dev/functions/agents/reset/"""
+		for ags in self.values():
+			ags.clear()
+			ags.columns.reset(self.model.goods)
+		self.index.clear()
+		self.edges.clear()
+		self.lastId = 0
+
+	def addPrimitive(self, name: str, class_, plural=None, dflt=50, low=1, high=100, step=1, hidden: bool=False, priority: int=100, order=None, columns: dict|None=None):
+		"""Register an agent primitive. `columns`, if specified, is passed to `Agents.useColumns()`. https://helipad.dev/functions/agents/addprimitive/"""
 		if name=='all': raise ValueError(ï('{} is a reserved name. Please choose another.').format(name))
 		if not plural: plural = name+'s'
 		class_.primitive = name
@@ -483,8 +650,10 @@ class Agents(MultiDict):
 			plural=plural,
 			priority=priority,
 			order=order,
-			breeds=Breeds(self.model, name)
+			breeds=Breeds(self.model, name),
+			columns=Columns()
 		)
+		if columns: self.useColumns(name, columns)
 		sort = dict(sorted(self.items(), key=lambda d: d[1].priority))
 		self.clear()
 		self.update(sort)
@@ -495,8 +664,30 @@ class Agents(MultiDict):
 			else: return len(model.agents[prim])
 		self.model.params.add('num_'+name, 'Number of '+plural.title(), 'hidden' if hidden else 'slider', dflt=dflt, opts={'low': low, 'high': high, 'step': step} if not hidden else None, setter=self.initialize, getter=popget)
 
+	def useColumns(self, prim: str, columns: dict):
+		"""Store the numeric properties in `columns` for agents of primitive `prim` in NumPy arrays rather than on each agent object. Keys are property names, and values are a dtype, or a tuple of a dtype and a length (e.g. `(float, 2)` for `position`). The primitive's agents are then created from a subclass of its class belonging to this model. https://helipad.dev/functions/agents/usecolumns/"""
+		if self.model.hasModel: raise RuntimeError(ï('Columnar storage cannot be enabled while a model is active.'))
+		for k in ('stocks', 'demand'):
+			if k in columns: raise ValueError(ï('{} is a reserved name. Please choose another.').format(k))
+
+		#The properties are installed on a subclass, so the class itself is left as it was for other models
+		p = self[prim]
+		if '_columnar' not in vars(p.class_):
+			base = p.class_
+			p.class_ = type(base.__name__, (base,), {'__slots__': (), '__module__': base.__module__, '__qualname__': base.__qualname__, '__doc__': base.__doc__, '_columnar': True})
+		for k in columns:
+			slot = getattr(p.class_, k, None)
+			if isinstance(slot, Column): slot = slot.slot #Already installed by an earlier call
+			setattr(p.class_, k, Column(k, slot if isinstance(slot, types.MemberDescriptorType) else None))
+		p.columns.add(columns)
+
 	def removePrimitive(self, name: str):
 		"""Removes a previously added primitive. https://helipad.dev/functions/agents/removeprimitive/"""
+		for a in self[name]:
+			self.unregister(a)
+			if a._edges is not None:
+				for e in a._edges.all:
+					if all(v.primitive==name for v in e.vertices): self.edges.unregister(e)
 		del self[name]
 		del self.model.params['num_'+name]
 
@@ -507,15 +698,59 @@ class Agents(MultiDict):
 			else: raise KeyError(ï('Breed must specify which primitive it belongs to.'))
 		return self[prim].breeds.add(name, color)
 
-	#Creates an unweighted and undirected network of a certain density
+	#Network generators. Each draws an array of index pairs from helipad.network and creates the edges among the agents of a primitive
+	#Edges are built in bulk, and edgeInit hooks run afterward only if there are any
+	def connect(self, agents: list, pairs, kind: str='edge'):
+		edges = self.edges.build([agents[i] for i in pairs[:,0].tolist()], [agents[j] for j in pairs[:,1].tolist()], kind)
+		if self.model.hooks.registered('edgeInit'):
+			for e in edges: self.model.doHooks('edgeInit', [e, kind, *e.vertices])
+
 	def createNetwork(self, density: float, kind: str='edge', prim=None):
 		"""Create a random undirected and unweighted network of a certain `density`∈[0,1] among agents of primitive `prim`. https://helipad.dev/functions/agents/createnetwork/"""
 		if density < 0 or density > 1: raise ValueError(ï('Network density must take a value between 0 and 1.'))
-		from itertools import combinations
+		from helipad.network import erdosRenyi
 		agents = self.all if prim is None else self[prim]
-		for c in combinations(agents, 2):
-			if np.random.randint(0,100) < density*100:
-				c[0].edges.add(c[1], kind)
+		self.connect(agents, erdosRenyi(self.model.rng, len(agents), density), kind)
+		return self.network(kind, prim)
+
+	def preferentialNetwork(self, m: int, kind: str='edge', prim=None):
+		"""Create a random scale-free network among agents of primitive `prim` by preferential attachment (the Barabási–Albert model), in which each agent connects to `m` agents before it with probability proportional to their number of connections. https://helipad.dev/functions/agents/preferentialnetwork/"""
+		from helipad.network import barabasiAlbert
+		agents = self.all if prim is None else self[prim]
+		self.connect(agents, barabasiAlbert(self.model.rng, len(agents), m), kind)
+		return self.network(kind, prim)
+
+	def smallWorldNetwork(self, k: int, p: float, kind: str='edge', prim=None):
+		"""Create a random small-world network among agents of primitive `prim` (the Watts–Strogatz model), a ring in which each agent is connected to its `k` nearest neighbors, and each connection is rewired to a random agent with probability `p`. https://helipad.dev/functions/agents/smallworldnetwork/"""
+		if p < 0 or p > 1: raise ValueError(ï('Rewiring probability must take a value between 0 and 1.'))
+		from helipad.network import wattsStrogatz
+		agents = self.all if prim is None else self[prim]
+		self.connect(agents, wattsStrogatz(self.model.rng, len(agents), k, p), kind)
+		return self.network(kind, prim)
+
+	def blockNetwork(self, densities: dict, kind: str='edge', prim=None):
+		"""Create a random network among agents of primitive `prim` (a stochastic block model) in which the density of connections between two agents depends on their breeds. `densities` is a `dict` of `dict`s, such that `densities[breed1][breed2]` is the density of connections between agents of `breed1` and `breed2`. Unspecified pairs are unconnected. https://helipad.dev/functions/agents/blocknetwork/"""
+		from helipad.network import stochasticBlock
+		agents = self.all if prim is None else self[prim]
+		breeds = list(dict.fromkeys(a.breed for a in agents))
+		blocks = {b: [] for b in breeds}
+		for i,a in enumerate(agents): blocks[a.breed].append(i)
+		matrix = np.zeros((len(breeds), len(breeds)))
+		for i, b1 in enumerate(breeds):
+			for j, b2 in enumerate(breeds):
+				d = densities.get(b1, {}).get(b2, densities.get(b2, {}).get(b1, 0))
+				if d < 0 or d > 1: raise ValueError(ï('Network density must take a value between 0 and 1.'))
+				matrix[i,j] = d
+		self.connect(agents, stochasticBlock(self.model.rng, [np.array(blocks[b], dtype=np.int64) for b in breeds], matrix), kind)
+		return self.network(kind, prim)
+
+	def configurationNetwork(self, degrees, kind: str='edge', prim=None):
+		"""Create a random network among agents of primitive `prim` (the configuration model) with given numbers of connections. `degrees` can be a list with a number for each agent in list order, or a function that takes an agent and returns its number. Self-connections and multiple connections between the same agents can occur. https://helipad.dev/functions/agents/configurationnetwork/"""
+		from helipad.network import configuration
+		agents = self.all if prim is None else self[prim]
+		if callable(degrees): degrees = [degrees(a) for a in agents]
+		if len(degrees) != len(agents): raise ValueError(ï('Expected {0} values but received {1}.').format(len(agents), len(degrees)))
+		self.connect(agents, configuration(self.model.rng, degrees), kind)
 		return self.network(kind, prim)
 
 	def network(self, kind: str='edge', prim=None, excludePatches: bool=False):
@@ -527,14 +762,21 @@ class Agents(MultiDict):
 		agents = list(self.all) if prim is None else self[prim]
 		if excludePatches: agents = [a for a in agents if a.primitive!='patch']
 		G.add_nodes_from([(a.id, {'breed': a.breed, 'primitive': a.primitive, 'position': None if a.position is None else list(a.position)}) for a in agents])
-		for e in self.edges[kind]:
-			if prim is None or (e.vertices[0].primitive==prim and e.vertices[1].primitive==prim): G.add_edge(
-				e.startpoint.id if e.directed else e.vertices[0].id,
-				e.endpoint.id if e.directed else e.vertices[1].id,
-				weight=e.weight, directed=e.directed
-			)
+		G.add_edges_from([(
+			e.startpoint.id if e.directed else e.vertices[0].id,
+			e.endpoint.id if e.directed else e.vertices[1].id,
+			{'weight': e.weight, 'directed': e.directed}
+		) for e in self.edges[kind] if prim is None or (e.vertices[0].primitive==prim and e.vertices[1].primitive==prim)])
 		return G
 
+	def adjacency(self, kind: str='edge', prim=None, weighted: bool=True, excludePatches: bool=False):
+		"""Export a network among agents of primitive `prim` (or all agents) as an `Adjacency` object, which holds a SciPy sparse matrix and the agent ID of each row, and provides degree, component, and breadth-first search functions. Requires SciPy. https://helipad.dev/functions/agents/adjacency/"""
+		try: from helipad.network import Adjacency
+		except ImportError: raise ImportError(ï('scipy is required for sparse network matrices.'))
+		agents = list(self.all) if prim is None else self[prim]
+		if excludePatches: agents = [a for a in agents if a.primitive!='patch']
+		return Adjacency.fromEdges(agents, self.edges[kind], weighted)
+
 	#Model param redundant, strictly speaking, but it's necessary to make the signature match the setter callback
 	def initialize(self, val, prim: str, model=None, force: bool=False):
 		"""Create and/or destroy agents to get a population number. This function is used as a setter function for agent population parameters, and also at the beginning of a model to create the initial agent set. https://helipad.dev/functions/agents/initialize/"""
@@ -546,8 +788,8 @@ class Agents(MultiDict):
 
 		#Add agents
 		if diff > 0:
-			maxid = max(ids) if (ids := [a.id for a in self.all]) else 0 #Figure out maximum existing ID
-			for aId in range(maxid+1, maxid+int(diff)+1):
+			for i in range(int(diff)):
+				aId = self.nextId()
 				breed = self.model.doHooks([prim+'DecideBreed', 'decideBreed'], [aId, self[prim].breeds.keys(), self.model])
 				if breed is None: breed = list(self[prim].breeds.keys())[aId%len(self[prim].breeds)]
 				if breed not in self[prim].breeds:
@@ -557,7 +799,7 @@ class Agents(MultiDict):
 
 		#Remove agents
 		elif diff < 0:
-			shuffle(array) #Delete agents at random
+			array.shuffle(self.model.random) #Delete agents at random
 
 			#Remove agents, maintaining the proportion between breeds
 			n = {x: 0 for x in self[prim].breeds.keys()}
@@ -572,6 +814,7 @@ class Agents(MultiDict):
 		"""Print summary statistics (n, mean, standard deviation, variance, maximum, minimum, and sum) for an agent property. https://helipad.dev/functions/agents/summary/"""
 		if prim is None:
 			prim = 'agent' if 'agent' in self else next(iter(self))
+		import pandas
 		agents = self[prim] if breed is None else self[prim][breed]
 		if not good: data = pandas.Series([getattr(a, var) for a in agents]) #Pandas gives us nice statistical functions
 		else: data = pandas.Series([a.stocks[var] for a in agents])
@@ -603,12 +846,274 @@ class Primitive(list):
 	"""List-like container for agents of a primitive, plus data defining that primitive. Stored within the `Agents` object. https://helipad.dev/functions/primitive/"""
 	def __init__(self, **kwargs):
 		for k,v in kwargs.items(): setattr(self, k, v)
+		self.byBreed: dict = {} #Agents of each breed in the list, as the keys of an insertion-ordered dict
 		super().__init__()
 
+	#Agents of a breed are returned in the order they entered the list, not list order
 	def __getitem__(self, val):
-		if isinstance(val, str): return [a for a in self if a.breed==val]
+		if isinstance(val, str): return list(self.byBreed.get(val, {}))
 		else: return super().__getitem__(val)
 
+	#Keep the breed index in sync with the list. Each agent's entry counts its places in the list, since swapping two
+	#agents one assignment at a time (e.g. in random.shuffle()) briefly puts one of them in the list twice
+	def append(self, agent: baseAgent):
+		super().append(agent)
+		self.indexAgent(agent)
+
+	def extend(self, agents):
+		for a in agents: self.append(a)
+
+	def __iadd__(self, agents):
+		self.extend(agents)
+		return self
+
+	def insert(self, i: int, agent: baseAgent):
+		super().insert(i, agent)
+		self.indexAgent(agent)
+
+	def remove(self, agent: baseAgent):
+		super().remove(agent)
+		self.unindex(agent)
+
+	def pop(self, i: int=-1) -> baseAgent:
+		agent = super().pop(i)
+		self.unindex(agent)
+		return agent
+
+	def __delitem__(self, i):
+		old = super().__getitem__(i)
+		super().__delitem__(i)
+		for a in (old if isinstance(i, slice) else [old]): self.unindex(a)
+
+	#Agents in both the old and new items keep their place in the breed index
+	def __setitem__(self, i, val):
+		old = super().__getitem__(i)
+		if isinstance(i, slice): val = list(val)
+		super().__setitem__(i, val)
+		for a in (val if isinstance(i, slice) else [val]): self.indexAgent(a)
+		for a in (old if isinstance(i, slice) else [old]): self.unindex(a)
+
+	def clear(self):
+		super().clear()
+		self.byBreed.clear()
+
+	def prune(self) -> list:
+		"""Remove dead agents from the list and the breed index, returning them."""
+		dead = [a for a in self if a.dead]
+		if dead:
+			for a in dead: self.unindex(a)
+			super().__setitem__(slice(None), [a for a in self if not a.dead])
+		return dead
+
+	def shuffle(self, rand):
+		"""Shuffle the list in place with `rand`, a `random.Random` object, drawing the same numbers as `rand.shuffle()` but leaving the breed index as it is."""
+		order = list(self)
+		rand.shuffle(order)
+		super().__setitem__(slice(None), order)
+
+	def indexAgent(self, agent: baseAgent):
+		"""Add an agent to the breed index, e.g. when it is added to the list."""
+		b = self.byBreed.setdefault(agent.breed, {})
+		b[agent] = b.get(agent, 0) + 1
+
+	def unindex(self, agent: baseAgent, breed: str|None=None):
+		"""Remove an agent from the breed index, e.g. when it is removed from the list."""
+		b = self.byBreed.get(agent.breed if breed is None else breed)
+		if b is not None and agent in b:
+			if b[agent] > 1: b[agent] -= 1
+			else: del b[agent]
+
+	def rebreed(self, agent: baseAgent, old: str):
+		"""Move an agent in the list from the index of breed `old` to that of its current breed."""
+		if agent in self.byBreed.get(old, {}):
+			self.byBreed.setdefault(agent.breed, {})[agent] = self.byBreed[old].pop(agent)
+
+	def reindex(self):
+		"""Rebuild the breed index from the list."""
+		self.byBreed.clear()
+		for a in self: self.indexAgent(a)
+
+	def array(self, key: str, good: str|None=None) -> np.ndarray:
+		"""A NumPy array of the property `key` (or of `good` within it, e.g. for `stocks`) across the primitive's agents, in list order. Used with `setArray()` to vectorize agent behavior in `agentStepBatch` hooks. https://helipad.dev/functions/primitive/array/"""
+		if (col := self.columns.get(key, good)) is not None: return col[self.columns.rows(self)]
+		if good is None: return np.array([getattr(a, key) for a in self])
+		return np.array([getattr(a, key)[good] for a in self])
+
+	def setArray(self, key: str, values, good: str|None=None):
+		"""Set the property `key` (or `good` within it) of each of the primitive's agents from a sequence of values in list order, e.g. an array returned from `Primitive.array()`. https://helipad.dev/functions/primitive/setarray/"""
+		if len(values) != len(self): raise ValueError(ï('Expected {0} values but received {1}.').format(len(self), len(values)))
+		if key!='currentDemand' and (col := self.columns.get(key, good)) is not None: #Demand goes through the agents to keep the model totals
+			col[self.columns.rows(self)] = values
+			return
+		if isinstance(values, np.ndarray): values = values.tolist()
+		if good is None:
+			for a,v in zip(self, values): setattr(a, key, v)
+		else:
+			for a,v in zip(self, values): getattr(a, key)[good] = v
+
+class Columns:
+	"""Struct-of-arrays storage for a primitive's agents, one NumPy array per property with a row per agent. Holds the agents' holdings of and current demand for goods, as (agents × goods) matrices under `'stocks'` and `'demand'`, and any numeric properties declared with `Agents.useColumns()`. Rows are in order of creation, not list order, and include agents born this period. Dead agents' rows are dropped at the end of each stage. Accessible at `Primitive.columns`. https://helipad.dev/functions/columns/"""
+	def __init__(self):
+		self.spec = {}
+		self.goods = {} #Column of each good in the holdings matrix
+		self.reset()
+
+	def add(self, spec: dict):
+		"""Declare columnar properties, mapping names to a dtype or a tuple of a dtype and a length."""
+		for k,v in spec.items():
+			dtype, length = v if isinstance(v, tuple) else (v, None)
+			self.spec[k] = (np.dtype(dtype), () if length is None else (length,))
+
+	def __contains__(self, key) -> bool: return key in self.spec
+	def __iter__(self): return iter(self.spec)
+	def __len__(self) -> int: return self.n
+	def __repr__(self): return f'<{self.__class__.__name__}: {", ".join(self.spec)}>'
+
+	def __getitem__(self, key: str) -> np.ndarray:
+		"""A view of the live rows of the column `key`. Writing to it sets the corresponding agents' properties."""
+		return self.data[key][:self.n]
+
+	def get(self, key: str, good: str|None=None) -> np.ndarray|None:
+		"""A view of the live rows of a columnar property, or of the holdings of or demand for `good` if `key` is `'stocks'` or `'currentDemand'`. Returns `None` if the property isn't stored in columns."""
+		if key in ('stocks', 'currentDemand'):
+			if good in self.goods: return self.data['stocks' if key=='stocks' else 'demand'][:self.n, self.goods[good]]
+		elif good is None and key in self.spec and key!='demand': return self.data[key][:self.n]
+		return None
+
+	def reset(self, goods: dict|None=None):
+		"""Empty the columns, e.g. when the model is set up again, and size the holdings matrix for `goods` if specified."""
+		if goods is not None:
+			self.goods = {g:i for i,g in enumerate(goods)}
+			self.spec['stocks'] = self.spec['demand'] = (np.dtype(float), (len(goods),))
+		self.n = 0
+		self.agents = [] #Row → agent
+		self.data = {k: self.empty(k, 0) for k in self.spec}
+
+	#Unset floats are NaN (read as None for vector properties), and other types, holdings, and demand zero
+	def empty(self, key: str, n: int) -> np.ndarray:
+		dtype, shape = self.spec[key]
+		return np.full((n, *shape), np.nan if dtype.kind=='f' and key not in ('stocks', 'demand') else 0, dtype=dtype)
+
+	def alloc(self, agent: baseAgent) -> None:
+		"""Assign a new row to `agent`, doubling the arrays' capacity if necessary."""
+		if self.data and self.n == len(next(iter(self.data.values()))):
+			cap = max(16, 2*self.n)
+			for k, arr in self.data.items():
+				new = self.empty(k, cap)
+				new[:self.n] = arr[:self.n]
+				self.data[k] = new
+			if 'stocks' in self.data:
+				for a in self.agents:
+					if a is not None: a.stocks.m = self.data['stocks']
+		agent._columns, agent._row = self, self.n
+		self.agents.append(agent)
+		self.n += 1
+
+	def adopt(self, agent: baseAgent) -> None:
+		"""Assign a row to an existing agent, moving its columnar properties from the object into the arrays."""
+		vals = {}
+		for k in self.spec:
+			if k not in ('stocks', 'demand') and (v := getattr(agent, k, Column)) is not Column: vals[k] = v
+		demand = agent._demand
+		self.alloc(agent)
+		agent._demand = None
+		for k,v in vals.items(): setattr(agent, k, v)
+		if 'stocks' in self.spec: agent.stocks.attach(self, agent._row)
+		if demand: agent.currentDemand = demand #Through the view, to add it to the model's totals
+
+	def release(self, agent: baseAgent) -> None:
+		"""Copy an agent's columnar properties back onto the object and free its row, which is removed on the next `compact()`. Its demand is taken out of the model's totals, which count only agents in the model."""
+		vals = {k: getattr(agent, k) for k in self.spec if k not in ('stocks', 'demand')}
+		if 'stocks' in self.spec: agent.stocks.detach()
+		demand = None
+		if 'demand' in self.spec:
+			demand = dict(agent.currentDemand.items())
+			totals = agent.model.goods.demand
+			for g,q in demand.items():
+				if g in totals: totals[g] -= q
+		self.agents[agent._row] = None
+		agent._columns, agent._demand = None, demand
+		del agent._row
+		for k,v in vals.items(): setattr(agent, k, v)
+
+	def compact(self) -> None:
+		"""Release dead agents and close the gaps left by freed rows, keeping the remaining rows in order."""
+		for a in self.agents:
+			if a is not None and a.dead: self.release(a)
+		keep = np.fromiter((i for i,a in enumerate(self.agents) if a is not None), dtype=np.intp)
+		if len(keep) == self.n: return
+		for k, arr in self.data.items():
+			arr[:len(keep)] = arr[keep]
+			arr[len(keep):self.n] = self.empty(k, self.n-len(keep)) #Rows are reused by new agents
+		self.agents = [self.agents[i] for i in keep]
+		for i,a in enumerate(self.agents): a._row = i
+		if 'stocks' in self.data:
+			for a in self.agents: a.stocks.row = a._row
+		self.n = len(keep)
+
+	def rows(self, agents) -> np.ndarray:
+		"""The row indices of a sequence of agents."""
+		return np.fromiter((a._row for a in agents), dtype=np.intp, count=len(agents))
+
+class Column:
+	"""Attribute proxy for a columnar property, installed on a subclass of the primitive's class by `Agents.useColumns()`. Reads and writes the agent's row in its `Columns`, or the object itself for agents not stored in columns."""
+	def __init__(self, name: str, slot=None):
+		self.name = name
+		self.slot = slot #The slot the property shadows, if it's one of baseAgent's, else it's kept in the object's dict
+		self.detached = weakref.WeakKeyDictionary() #Values for agents whose class has no dict, e.g. when dead or transferred
+
+	def store(self, agent) -> dict:
+		"""Where the property is kept for an agent that isn't in columns."""
+		try: return agent.__dict__
+		except AttributeError: return self.detached.setdefault(agent, {})
+
+	#The class outlives the model, so the property may not be in the columns of the agent's current model
+	def __get__(self, agent, cls=None):
+		if agent is None: return self
+		if (cols := agent._columns) is None or (arr := cols.data.get(self.name)) is None:
+			if self.slot is not None: return self.slot.__get__(agent, cls)
+			try: return self.store(agent)[self.name]
+			except KeyError: raise AttributeError(self.name) from None
+		if arr.ndim==1: return arr.item(agent._row)
+		v = arr[agent._row]
+		return None if v.dtype.kind=='f' and np.isnan(v).all() else v.tolist()
+
+	def __set__(self, agent, val):
+		if (cols := agent._columns) is not None and (arr := cols.data.get(self.name)) is not None: arr[agent._row] = np.nan if val is None else val
+		elif self.slot is not None: self.slot.__set__(agent, val)
+		else: self.store(agent)[self.name] = val
+
+class MatchPool(list):
+	"""The list of agents still awaiting a match in a stage with `match` ordering, shuffled once on creation. Drawing, removing, and returning agents are all O(1), so matching a population is linear rather than quadratic in its size. Passed to `matchSelect` hooks, which should treat it as read-only. https://helipad.dev/functions/matchpool/"""
+	def __init__(self, agents, rand):
+		super().__init__(agents)
+		self.random = rand
+		rand.shuffle(self)
+		self.index = {a:i for i,a in enumerate(self)}
+
+	def __contains__(self, agent) -> bool: return agent in self.index
+
+	def draw(self):
+		"""Remove and return a random agent from the pool."""
+		agent = super().pop()
+		del self.index[agent]
+		return agent
+
+	def remove(self, agent):
+		"""Remove a particular agent from the pool by swapping the last agent into its place."""
+		if agent not in self.index: raise ValueError(ï('{} is not in the match pool.').format(agent))
+		i, last = self.index.pop(agent), super().pop()
+		if last is not agent:
+			self[i] = last
+			self.index[last] = i
+
+	def put(self, agent):
+		"""Return an agent to a random position in the pool. Since the pool was uniformly shuffled, it remains so."""
+		self.append(agent)
+		j = self.random.randrange(len(self))
+		self[-1], self[j] = self[j], agent
+		self.index[self[-1]], self.index[agent] = len(self)-1, j
+
 class gandb(funcStore):
 	"""Base class for breeds and goods containers. Should not be called directly"""
 	def __init__(self, model):
@@ -657,10 +1162,29 @@ class Breeds(gandb):
 
 class Edges(MultiDict):
 	"""Interface for adding and storing connections between agents that define a network. Stored in `Agent.edges`. https://helipad.dev/functions/edges/"""
+	__slots__ = ('agent', 'cache')
+
 	def __init__(self, agent: baseAgent):
 		self.agent = agent
+		self.cache = {} #Edges and partners by kind and direction, built on first use
 		super().__init__()
 
+	def __getstate__(self): return self.agent
+	def __setstate__(self, agent): self.agent, self.cache = agent, {}
+
+	def invalidate(self, kind: str):
+		"""Drop the cached directional lists of edges of `kind`. Called when an edge of that kind is added, cut, or reassigned."""
+		self.cache.pop(kind, None)
+
+	#Sort the edges of a kind by direction once, and serve later calls from the cache until they change
+	def directional(self, kind: str, inbound: bool, undirected: bool, obj: str) -> list:
+		cache = self.cache.setdefault(kind, {})
+		key = (inbound, undirected, obj)
+		if key not in cache:
+			edges = [edge for edge in self[kind] if (edge.endpoint if inbound else edge.startpoint) is self.agent or (undirected and not edge.directed)]
+			cache[key] = edges if obj=='edge' else [e.partner(self.agent) for e in edges]
+		return cache[key]
+
 	def add(self, partner: baseAgent, kind: str='edge', direction=None, weight=1):
 		"""Create a network connection between the current agent and `partner`. https://helipad.dev/functions/edges/add/"""
 		return Edge(self.agent, partner, kind, direction, weight)
@@ -668,22 +1192,20 @@ class Edges(MultiDict):
 	def outbound(self, kind='edge', undirected: bool=False, obj: str='edge'):
 		"""Return a list of edges for which the agent is a startpoint. Undirected edges can be excluded or included with `undirected`. https://helipad.dev/functions/edges/outbound/"""
 		if obj not in ['agent', 'edge']: raise ValueError(ï('Object must be specified either \'agent\' or \'edge\'.'))
-		if kind is None: edges = self.all
-		else:
-			if kind not in self: return []
-			edges = self[kind]
-		ob = [edge for edge in edges if edge.startpoint == self.agent or (undirected and not edge.directed)]
-		return ob if obj=='edge' else [e.partner(self.agent) for e in ob]
+		if kind is None:
+			ob = [edge for edge in self.all if edge.startpoint == self.agent or (undirected and not edge.directed)]
+			return ob if obj=='edge' else [e.partner(self.agent) for e in ob]
+		if kind not in self: return []
+		return list(self.directional(kind, False, undirected, obj))
 
 	def inbound(self, kind='edge', undirected: bool=False, obj: str='edge'):
 		"""Return a list of edges for which the agent is an endpoint. Undirected edges can be excluded or included with `undirected`. https://helipad.dev/functions/edges/inbound/"""
 		if obj not in ['agent', 'edge']: raise ValueError(ï('Object must be specified either \'agent\' or \'edge\'.'))
-		if kind is None: edges = self.all
-		else:
-			if kind not in self: return []
-			edges = self[kind]
-		ib = [edge for edge in edges if edge.endpoint == self.agent or (undirected and not edge.directed)]
-		return ib if obj=='edge' else [e.partner(self.agent) for e in ib]
+		if kind is None:
+			ib = [edge for edge in self.all if edge.endpoint == self.agent or (undirected and not edge.directed)]
+			return ib if obj=='edge' else [e.partner(self.agent) for e in ib]
+		if kind not in self: return []
+		return list(self.directional(kind, True, undirected, obj))
 
 	def With(self, partner: baseAgent, kind='edge'):
 		"""Returns a list of direct connections with `partner`. Does not indicate indirect connections. https://helipad.dev/functions/edges/with/"""
@@ -695,33 +1217,88 @@ class Edges(MultiDict):
 
 class ModelEdges(MultiDict):
 	"""Interface for gathering aggregations of connections between agents. Stored in `model.agent.edges`."""
+	#Edges are registered by kind as they're created and removed when cut, so listing them doesn't walk the agents.
+	#Each kind holds an insertion-ordered dict of edges, so registration and removal are O(1).
 	def __init__(self, agents: Agents):
 		self.agents = agents
 		super().__init__()
 
-	def __getitem__(self, val): return [e for e in self.all if e.kind==val]
-	def __contains__(self, val) -> bool: return val in list(self.keys())
-	def items(self): yield from self._dict.items()
-	def values(self): yield from self._dict.values()
-	def keys(self):
-		ks = []
-		for e in self.all:
-			if e.kind not in ks: ks.append(e.kind)
-		yield from ks
-	__iter__ = keys
+	def __getitem__(self, val): return list(super().get(val, ()))
+	def items(self): yield from ((k, list(v)) for k,v in super().items())
+	def values(self): yield from (list(v) for v in super().values())
 	def __repr__(self): return self._dict.__repr__()
 
+	def register(self, edge: Edge) -> None:
+		"""Add an edge to the model's network of its kind."""
+		if edge.kind not in self: super().__setitem__(edge.kind, {})
+		super().__getitem__(edge.kind)[edge] = None
+
+	def unregister(self, edge: Edge) -> None:
+		"""Remove an edge from the model's network of its kind, dropping the kind if it has no edges left."""
+		if (es := super().get(edge.kind)) is not None and edge in es:
+			del es[edge]
+			if not es: del self[edge.kind]
+
+	def addMany(self, sources, targets=None, kind: str='edge', weights=None, directed: bool|None=None) -> list[Edge]:
+		"""Create edges in bulk from agent IDs in the sequences `sources` and `targets`, e.g. NumPy arrays. Alternatively, `sources` can be the path to an edge list file with a source ID, a target ID, and optionally a weight on each line, or a NetworkX graph whose nodes are agent IDs, in which case `targets` is omitted. `weights` can be a single number or a sequence. Edges are undirected unless `directed` is `True`, or the graph is directed. Runs the `edgeInitBatch` hook once with the list of new edges, rather than `edgeInit` for each one. https://helipad.dev/functions/modeledges/addmany/"""
+		if isinstance(sources, (str, os.PathLike)):
+			with open(sources) as f: data = np.loadtxt((l.replace(',', ' ') for l in f), ndmin=2)
+			sources, targets = data[:,0].astype(np.int64), data[:,1].astype(np.int64)
+			if weights is None and data.shape[1] > 2: weights = data[:,2]
+		elif hasattr(sources, 'is_directed') and hasattr(sources, 'edges'): #NetworkX graph
+			G = sources
+			if directed is None: directed = G.is_directed()
+			sources, targets, w = zip(*G.edges(data='weight', default=1)) if G.number_of_edges() else ((), (), ())
+			if weights is None: weights = w
+		if targets is None or len(sources) != len(targets): raise ValueError(ï('Sources and targets must be the same length.'))
+
+		index = self.agents.index
+		try: agents1, agents2 = [index[i] for i in np.asarray(sources).tolist()], [index[i] for i in np.asarray(targets).tolist()]
+		except KeyError as e: raise KeyError(ï('Agent {} does not exist.').format(e.args[0])) from None
+		edges = self.build(agents1, agents2, kind, weights, bool(directed))
+		self.agents.model.doHooks('edgeInitBatch', [edges, kind, self.agents.model])
+		return edges
+
+	def build(self, agents1: list, agents2: list, kind: str='edge', weights=None, directed: bool=False) -> list[Edge]:
+		"""Create edges between corresponding agents of two lists without running any hooks. Used by `addMany()` and the network generators."""
+		if weights is None or np.isscalar(weights): weights = [1 if weights is None else weights]*len(agents1)
+		elif len(weights) != len(agents1): raise ValueError(ï('Expected {0} values but received {1}.').format(len(agents1), len(weights)))
+		else: weights = np.asarray(weights).tolist()
+
+		#Bypass Edge.__init__, which checks its arguments and runs a hook for each edge.
+		#Pause garbage collection, which would otherwise rescan the growing heap many times over while creating millions of objects.
+		new, edges, touched = Edge.__new__, [], {}
+		gcOn = gc.isenabled()
+		gc.disable()
+		try:
+			for a1, a2, w in zip(agents1, agents2, weights):
+				e = new(Edge)
+				e.active, e.kind, e.vertices, e.weight, e.directed = True, kind, (a1, a2), w, directed
+				e.startpoint, e.endpoint = (a1, a2) if directed else (None, None)
+				edges.append(e)
+				for a in ((a1, a2) if a1 is not a2 else (a1,)):
+					if (l := touched.get(a)) is None:
+						ae = a.edges
+						if kind not in ae: ae[kind] = []
+						l = touched[a] = ae[kind]
+					l.append(e)
+		finally:
+			if gcOn: gc.enable()
+		for a in touched: a.edges.invalidate(kind)
+		if edges:
+			if kind not in self: super().__setitem__(kind, {})
+			super().__getitem__(kind).update(dict.fromkeys(edges))
+			for m in {a.model for a in touched} - {self.agents.model}: #Edges to agents in other models of a multi-level model
+				for e in edges:
+					if e.vertices[0].model is m or e.vertices[1].model is m: m.agents.edges.register(e)
+		return edges
+
 	@property
-	def _dict(self):
-		es = {}
-		for e in self.all:
-			if e.kind not in es: es[e.kind] = []
-			if e not in es[e.kind]: es[e.kind].append(e)
-		return es
+	def _dict(self) -> dict: return dict(self.items())
 
 	@property
 	def all(self) -> list:
 		"""A list of all network edges in the model."""
 		es = []
-		for a in self.agents.all: es += a.edges.all
+		for v in super().values(): es += v
 		return es
@@ -0,0 +1,166 @@
+"""
+Functions to save the state of a running model to disk and restore it later. This module should not be imported directly; use `model.checkpoint()` and `model.restore()` instead. See https://helipad.dev/functions/model/checkpoint/
+"""
+
+import os, pickle, copyreg, random, types
+import numpy as np
+from functools import cache
+from helipad.helpers import ï
+from helipad.agent import baseAgent
+
+#The model and its containers are rebuilt by the model's setup code, so references to them from agents are stored by name
+def containers(model) -> dict:
+	objs = {'model': model, 'agents': model.agents, 'params': model.params, 'shocks': model.shocks, 'goods': model.goods, 'data': model.data, 'events': model.events, 'hooks': model.hooks}
+	return {id(v): k for k,v in objs.items()}
+
+#Model attributes belonging to Helipad itself; any others were set by user code and are saved along with the agents
+builtins = {'agents', 'birthqueue', 'data', 'params', 'shocks', 'events', 'hooks', 'goods', 'profiler', 'name', 'patches', 'stages', 'hasModel', 'timer', 'visual', 'cpanel', 't', 'running', '_cut', '_autoCheckpoint', 'seedSeq', 'rng', 'random', 'reporter', 'hook', 'button', 'event'}
+
+#The slots of an agent class, read and written directly since subclasses may shadow them with properties
+@cache
+def slots(cls) -> dict:
+	sl = {}
+	for c in reversed(cls.__mro__):
+		for k,v in vars(c).items():
+			if isinstance(v, types.MemberDescriptorType) and k not in ('_columns', '_edges', '_demand'): sl[k] = v
+	return sl
+
+def setAgentState(agent, state):
+	d, sl, cols = state
+	agent._columns = agent._demand = None
+	if d: agent.__dict__.update(d)
+	for k,v in sl.items(): slots(type(agent))[k].__set__(agent, v)
+	for k,v in cols.items(): setattr(agent, k, v)
+
+class CheckpointPickler(pickle.Pickler):
+	def __init__(self, file, model):
+		super().__init__(file, pickle.HIGHEST_PROTOCOL)
+		self.refs = containers(model)
+		self.agents = []
+
+	#Classes made by useColumns() can't be found by name, but are made again by the model's setup code
+	def persistent_id(self, obj):
+		if isinstance(obj, type) and '_columnar' in vars(obj): return ('class', obj.primitive)
+		return self.refs.get(id(obj))
+
+	#Pickling an agent's edges along with it would recurse through the whole network,
+	#so they're stored afterward, once every agent they might point to has been stored
+	def reducer_override(self, obj):
+		if not isinstance(obj, baseAgent): return NotImplemented
+		self.agents.append(obj)
+		sl = {}
+		for k,v in slots(type(obj)).items():
+			try: sl[k] = v.__get__(obj)
+			except AttributeError: pass #Unset
+		#Columnar properties are stored as values on the object and moved back into the arrays on load
+		cols = {k: getattr(obj, k) for k in obj._columns if k not in ('stocks', 'demand')} if obj._columns is not None else {}
+		return copyreg.__newobj__, (type(obj),), (getattr(obj, '__dict__', None), sl, cols), None, None, setAgentState
+
+	def dump(self, obj):
+		super().dump(obj)
+		i = 0
+		while i < len(self.agents): #Edges may lead to agents not otherwise stored
+			batch, i = self.agents[i:], len(self.agents)
+			super().dump([(a, a._edges) for a in batch])
+		super().dump(None)
+
+class CheckpointUnpickler(pickle.Unpickler):
+	def __init__(self, file, model):
+		super().__init__(file)
+		self.model = model
+
+	def persistent_load(self, pid):
+		if isinstance(pid, tuple): return self.model.agents[pid[1]].class_
+		return self.model if pid=='model' else getattr(self.model, pid)
+
+	def load(self):
+		obj = super().load()
+		while (batch := super().load()) is not None:
+			for agent, edges in batch: agent._edges = edges
+		return obj
+
+def dump(model, file) -> None:
+	"""Write the model's state at the end of the current period to an open binary file."""
+	if not model.hasModel: raise RuntimeError(ï('A model must be set up before it can be checkpointed.'))
+	params = {}
+	for n,p in model.params.items():
+		if getattr(p, 'config', False) or getattr(p, 'getter', False): continue #Skip run options and values derived from the model
+		params[n] = p.get() if p.per is None else {i: p.get(i) for i in p.pKeys}
+
+	state = {
+		't': model.t,
+		'agents': {prim: list(agents) for prim, agents in model.agents.items()},
+		'lastId': model.agents.lastId,
+		'breeds': {prim: {b: [a.id for a in d] for b,d in agents.byBreed.items()} for prim, agents in model.agents.items()}, #Keep the order for reductions
+		'patches': model.patches,
+		'edges': model.agents.edges._dict,
+		'attrs': {k:v for k,v in vars(model).items() if k not in builtins and not callable(v)},
+		'params': params,
+		'shocks': model.shocks.get(),
+		'events': {k: (e.triggered, e.data) for k,e in model.events.items()},
+		'data': {k: (r.data, {c: d[1] for c,d in r.children.items()}) for k,r in model.data.reporters.items()},
+		'rng': (model.seedSeq, model.random, model.rng, random.getstate(), np.random.get_state()),
+		'user': {}
+	}
+	model.doHooks('modelCheckpoint', [model, state['user']])
+
+	try: CheckpointPickler(file, model).dump(state)
+	except (pickle.PicklingError, AttributeError, TypeError) as e:
+		raise RuntimeError(ï('The model state could not be saved ({}). Objects defined inside functions cannot be checkpointed; use the modelCheckpoint and modelRestore hooks to save their state instead.').format(e))
+
+def save(model, path: str) -> None:
+	"""Write the model's state at the end of the current period to `path`."""
+	#Write to a hidden file first, so an interrupted write doesn't clobber the previous checkpoint
+	tmp = os.path.join(os.path.dirname(path), '.'+os.path.basename(path))
+	try:
+		with open(tmp, 'wb') as f: dump(model, f)
+	except RuntimeError:
+		os.remove(tmp)
+		raise
+	os.replace(tmp, path)
+
+def load(model, file) -> None:
+	"""Set up `model` and replace its state with a checkpoint, either a filename or an open binary file."""
+	if isinstance(file, (str, os.PathLike)):
+		with open(file, 'rb') as f: state = CheckpointUnpickler(f, model).load()
+	else: state = CheckpointUnpickler(file, model).load()
+	if state['agents'].keys() != model.agents.keys():
+		raise ValueError(ï('The checkpoint does not match the model\'s primitives.'))
+
+	#Parameters have to be in place before setup
+	for n,v in state['params'].items():
+		if n not in model.params: continue
+		p = model.params[n]
+		if p.per is None: p.set(v)
+		else:
+			for i, iv in v.items(): p.set(iv, i)
+	model.shocks.set(state['shocks'])
+	model.setup()
+
+	for prim, agents in state['agents'].items():
+		model.agents[prim][:] = agents
+		model.agents[prim].columns.reset()
+		for a in sorted(agents, key=lambda a: getattr(a, '_row', 0)): model.agents[prim].columns.adopt(a) #Keep the row order for reductions
+	model.agents.index = {a.id: a for a in model.agents.all}
+	for prim, breeds in state['breeds'].items():
+		model.agents[prim].byBreed = {b: dict.fromkeys((model.agents.index[i] for i in ids), 1) for b, ids in breeds.items()}
+	model.agents.lastId = state['lastId']
+	model.patches = state['patches']
+	model.agents.edges.clear()
+	for es in state['edges'].values():
+		for e in es: model.agents.edges.register(e)
+	for k,v in state['attrs'].items(): setattr(model, k, v)
+	for k, (data, children) in state['data'].items():
+		if k not in model.data.reporters: continue
+		r = model.data.reporters[k]
+		r.data[:] = data
+		for c, d in children.items():
+			if c in r.children: r.children[c][1][:] = d
+	for k, (triggered, data) in state['events'].items():
+		if k in model.events: model.events[k].triggered, model.events[k].data = triggered, data
+
+	model.t = state['t']
+	model.seedSeq, model.random, model.rng, pyState, npState = state['rng']
+	random.setstate(pyState)
+	np.random.set_state(npState)
+	model.doHooks('modelRestore', [model, state['user']])
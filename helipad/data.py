@@ -3,7 +3,7 @@ Classes for collecting and exporting data from model runs. This module should no
 """
 
 import os.path
-import pandas, numpy as np
+import numpy as np
 from helipad.helpers import ï
 from dataclasses import dataclass
 from typing import Callable
@@ -40,7 +40,13 @@ class Data:
 	def collect(self, model):
 		"""Iterate over all the registered reporters and collect model data each period. This function is called from `model.step()` and should not be called from user code. https://helipad.dev/functions/data/collect/"""
 		model.doHooks('dataCollect', [self, model.t])
-		for v in self.reporters.values(): v.collect(model)
+		if not model.profiler.active:
+			for v in self.reporters.values(): v.collect(model)
+		else:
+			for k,v in self.reporters.items():
+				if k.startswith('profile/'): v.collect(model) #Don't time the profiler's own reporters
+				else:
+					with model.profiler('reporter/'+k): v.collect(model)
 
 	def reset(self):
 		"""Clear all model data. Generally used to clean up between model runs. https://helipad.dev/functions/data/reset/"""
@@ -67,6 +73,7 @@ class Data:
 	@property
 	def dataframe(self):
 		"""A `Pandas` dataframe with the model run data. https://helipad.dev/functions/data/#dataframe"""
+		import pandas
 		return pandas.DataFrame(self.all)
 
 	#
@@ -92,13 +99,24 @@ class Data:
 		else: subplots = None
 
 		def reporter(model):
-			#Construct list of values
-			array = [getattr(a, key) for a in (model.agents.all if prim=='all' else model.agents[prim]) if breed is None or breed==a.breed]
-			if good is not None: array = [v[good] for v in array]
-			u = [v for v in array if v is not None]
-
-			if not u: return 0
-			elif stat=='sum':	return sum(u)
+			#Read holdings and columnar properties straight from the arrays; otherwise construct list of values
+			prims = list(model.agents.values()) if prim=='all' else [model.agents[prim]]
+			if all(p.columns.get(key, good) is not None for p in prims):
+				u = np.concatenate([p.columns.get(key, good) if breed is None else p.columns.get(key, good)[p.columns.rows(p[breed])] for p in prims])
+				if u.dtype.kind=='f': u = u[~np.isnan(u)]
+			else:
+				array = [getattr(a, key) for p in prims for a in (p if breed is None else p[breed])]
+				if good is not None: array = [v[good] for v in array]
+				u = [v for v in array if v is not None]
+
+			v = summarize(u)
+			#Holdings and demand are stored as floats, but whole quantities are reported as ints, as on the agents themselves
+			if key in ('stocks', 'currentDemand') and isinstance(v, (float, np.floating)) and v.is_integer() and (stat in ('sum', 'max', 'min') or 'percentile-' in stat): return int(v)
+			return v
+
+		def summarize(u):
+			if not len(u): return 0
+			elif stat=='sum':	return sum(u) if isinstance(u, list) else u.sum()
 			elif stat=='mean':	return np.mean(u)
 			elif stat=='gmean':	return np.exp(np.log(u).sum()/len(u))
 			elif stat=='std':	return np.std(u)
@@ -2,7 +2,7 @@
 Helper classes and functions used internally in Helipad. This module should not be imported directly.
 """
 
-import warnings
+import warnings, os
 from functools import cache
 from sys import __stdout__
 from io import BufferedWriter
@@ -27,6 +27,35 @@ def isNotebook() -> bool:
 		return 'InteractiveShell' in get_ipython().__class__.__name__ # type: ignore 
 	except NameError: return False
 
+@cache #Once per process, so constructing models repeatedly (e.g. in a parameter sweep) doesn't repeat the network request
+def checkUpdates() -> None:
+	"""Check PyPI for a newer version of Helipad and print a notice if there is one. Set the `HELIPAD_NO_UPDATE_CHECK` environment variable to skip the check."""
+	if os.environ.get('HELIPAD_NO_UPDATE_CHECK'): return
+	from helipad.__init__ import __version__
+	import xmlrpc.client, ssl
+
+	#Is v1 bigger than v2?
+	#There's a `packaging` function to do this, but let's not bloat our dependencies.
+	def vcompare(vs1: str, vs2: str) -> bool:
+		v1, v2 = list(map(int, vs1.split('.'))), list(map(int, vs2.split('.')))
+
+		#Pad major releases with zeroes to make comparable
+		maxl = max([len(v1), len(v2)])
+		for v in [v1,v2]:
+			if len(v)<maxl: v += [0 for i in range(maxl-len(v))]
+
+		for k,i in enumerate(v1):
+			if i > v2[k]: return True
+			elif i < v2[k]: return False
+		return False
+
+	try:
+		pypi = xmlrpc.client.ServerProxy('https://pypi.org/pypi', context=ssl._create_unverified_context())
+		available: str = pypi.package_releases('helipad')
+		if vcompare(available[0], __version__):
+			print(ï('A Helipad update is available! Use `pip install -U helipad` to upgrade to version {}.').format(available[0]))
+	except: pass #Fail silently if we're not online
+
 def isBuffered() -> bool:
 	"""Check whether the current Python script is running in a buffered or unbuffered console."""
 	return isinstance(__stdout__.buffer, BufferedWriter)
@@ -65,19 +94,31 @@ class funcStore(dict):
 			del self[name]
 			return True
 
-import colorsys, matplotlib.colors as mplcolor
+import colorsys
 class Color:
 	"""Defines a color and provides functions to manipulate it. https://helipad.dev/functions/color/"""
 	def __init__(self, color):
 		#Can take a hex string, color name, or [r,g,b] list/tuple.
-		self.rgb = mplcolor.hex2color(color) if isinstance(color, str) else list(color)
+		#Strings (and derived colors) are resolved on first use, so Matplotlib is only imported if colors are actually needed
+		self._rgb = color if isinstance(color, str) or callable(color) else list(color)
 
 	def __repr__(self): return f'<Color: ({round(self.r*100)},{round(self.g*100)},{round(self.b*100)})>'
 
 	@property
-	def hex(self): return mplcolor.to_hex(self.rgb)
+	def rgb(self) -> list:
+		if isinstance(self._rgb, str):
+			import matplotlib.colors as mplcolor
+			self._rgb = list(mplcolor.to_rgb(self._rgb))
+		elif callable(self._rgb): self._rgb = list(self._rgb())
+		return self._rgb
+
+	@rgb.setter
+	def rgb(self, val): self._rgb = list(val)
+
+	@property
+	def hex(self): return '#'+''.join(format(round(c*255), '02x') for c in self.rgb)
 	@property
-	def hsv(self): return list(mplcolor.rgb_to_hsv(self.rgb))
+	def hsv(self): return list(colorsys.rgb_to_hsv(*self.rgb))
 	@property
 	def r(self): return self.rgb[0]
 	@property
@@ -93,17 +134,21 @@ class Color:
 
 	def lighten(self, factor=3):
 		"""Creates a new color, lighter than the existing color by `factor`."""
-		hls = colorsys.rgb_to_hls(*self.rgb)
-		return Color(colorsys.hls_to_rgb(hls[0], (1-1/factor) + hls[1]/factor, hls[2]))
+		def lighter():
+			hls = colorsys.rgb_to_hls(*self.rgb)
+			return colorsys.hls_to_rgb(hls[0], (1-1/factor) + hls[1]/factor, hls[2])
+		return Color(lighter)
 
 	def darken(self):
 		"""Create a new color, slightly darker than the original."""
-		hls = colorsys.rgb_to_hls(*self.rgb)
-		return Color(colorsys.hls_to_rgb(hls[0], hls[1]-0.075 if hls[1]>0.075 else 0, hls[2]))
+		def darker():
+			hls = colorsys.rgb_to_hls(*self.rgb)
+			return colorsys.hls_to_rgb(hls[0], hls[1]-0.075 if hls[1]>0.075 else 0, hls[2])
+		return Color(darker)
 
 	def blend(self, color2):
 		"""Create a new color halfway between the existing color and another. https://helipad.dev/functions/color/blend/"""
-		return Color(((self.r+color2.r)/2, (self.g+color2.g)/2, (self.b+color2.b)/2))
+		return Color(lambda: ((self.r+color2.r)/2, (self.g+color2.g)/2, (self.b+color2.b)/2))
 
 def makeDivisible(n, div, c='min'):
 	return n-n%div if c=='min' else n+(div-n%div if n%div!=0 else 0)
\ No newline at end of file
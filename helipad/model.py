@@ -2,12 +2,15 @@
 The main model module. Import and instantiate the `Helipad` class to set up and launch a model. See https://helipad.dev for API documentation.
 """
 
-import os, sys, warnings, asyncio, time
-import gettext
-from random import shuffle, choice
+from __future__ import annotations
+import os, sys, warnings, time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+import gettext, random
 #from memory_profiler import profile
 
-from helipad.visualize import BaseVisualization, TimeSeries
+#Visualization pulls in Matplotlib, so only import it once a visualization is actually used
+if TYPE_CHECKING: from helipad.visualize import BaseVisualization
 from helipad.helpers import *
 from helipad.param import Params, Shocks
 from helipad.data import Data
@@ -33,6 +36,7 @@ class Helipad:
 		self.events: Events = Events()
 		self.hooks: Hooks = Hooks()
 		self.goods: Goods = Goods(self)
+		self.profiler: Profiler = Profiler(self)
 
 		self.name: str = ''
 		self.patches: list = []
@@ -45,6 +49,8 @@ class Helipad:
 		self.t: int|None = None
 		self.running: bool = False
 		self._cut: bool = False
+		self._autoCheckpoint: tuple|None = None
+		self.seed()
 
 		#Default parameters
 		self.agents.addPrimitive('agent', Agent, dflt=50, low=1, high=100)
@@ -75,31 +81,7 @@ class Helipad:
 			self.params.add('refresh', ï('Refresh Every __ Periods'), 'slider', 20, opts=[1, 2, 5, 10, 20, 50, 100, 200, 500, 1000], runtime=True, config=True)
 			self.params['shocks'] = self.shocks
 
-			#Check for updates
-			from helipad.__init__ import __version__
-			import xmlrpc.client, ssl
-
-			#Is v1 bigger than v2?
-			#There's a `packaging` function to do this, but let's not bloat our dependencies.
-			def vcompare(vs1: str, vs2: str) -> bool:
-				v1, v2 = list(map(int, vs1.split('.'))), list(map(int, vs2.split('.')))
-
-				#Pad major releases with zeroes to make comparable
-				maxl = max([len(v1), len(v2)])
-				for v in [v1,v2]:
-					if len(v)<maxl: v += [0 for i in range(maxl-len(v))]
-
-				for k,i in enumerate(v1):
-					if i > v2[k]: return True
-					elif i < v2[k]: return False
-				return False
-
-			try:
-				pypi = xmlrpc.client.ServerProxy('https://pypi.org/pypi', context=ssl._create_unverified_context())
-				available: str = pypi.package_releases('helipad')
-				if vcompare(available[0], __version__):
-					print(ï('A Helipad update is available! Use `pip install -U helipad` to upgrade to version {}.').format(available[0]))
-			except: pass #Fail silently if we're not online
+			checkUpdates()
 
 	def __repr__(self) -> str:
 		if self.name: return f'<Helipad: {self.name}>'
@@ -123,18 +105,29 @@ class Helipad:
 		if val is not None: paramobj.set(val, item)
 		else: return paramobj.get(item)
 
-	def doHooks(self, place: str, args: list):
-		"""Execute registered hooks at various places in the model and return the value of the last function in the list. https://helipad.dev/functions/model/dohooks/"""
+	def doHooks(self, place: str|list|tuple, args: list):
+		"""Execute registered hooks at various places in the model and return the value of the last function in the list. If `place` is a list or tuple of hook names, run each in turn until one returns a value. https://helipad.dev/functions/model/dohooks/"""
+		if isinstance(place, list): place = tuple(place)
+		try: table = self.hooks.table[place]
+		except KeyError: table = self.hooks.compile(place)
+		if not table: return None
+
 		#Take a list of hooks; go until we get a response
-		if isinstance(place, list):
-			for f in place:
-				r = self.doHooks(f, args)
-				if r is not None: return r
-			return None
-
-		if place not in self.hooks: return None
-		for f in self.hooks[place]: r = f(*args)
-		return r
+		for fns in table:
+			for f in fns: r = f(*args)
+			if r is not None: return r
+		return None
+
+	def seed(self, seed=None) -> None:
+		"""Seed the model's random number generators. `seed` can be an int or a `numpy.random.SeedSequence`; if `None`, fresh entropy is drawn from the OS and can be recovered afterward from `model.seedSeq.entropy`. Each call to `model.setup()` spawns an independent substream from the seed into `model.random` (a Python `random.Random` object) and `model.rng` (a NumPy `Generator`), which Helipad uses for agent ordering, matching, network generation, mutation, shocks, and spatial placement. Hook functions should draw from these as well for model runs to be reproducible."""
+		self.seedSeq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+		self.spawnRNG()
+
+	def spawnRNG(self) -> None:
+		"""Replace `model.random` and `model.rng` with a new independent substream of the model's seed."""
+		stream = self.seedSeq.spawn(1)[0]
+		self.rng = np.random.default_rng(stream)
+		self.random = random.Random(int.from_bytes(stream.generate_state(4).tobytes(), 'little'))
 
 	def useVisual(self, viz: type[BaseVisualization]) -> BaseVisualization|None:
 		"""Register a visualization class for live model visualization. Visualization classes can be imported from `helipad.visualize`, or custom visualization classes can be subclassed from `BaseVisualization`. The visualization can then be launched later using model.launchVisual(). https://helipad.dev/functions/model/usevisual/"""
@@ -143,6 +136,7 @@ class Helipad:
 			return #Doesn't matter if it's not the top-level model
 
 		if viz is not None:
+			from helipad.visualize import BaseVisualization
 			try: assert issubclass(viz, BaseVisualization)
 			except AssertionError: raise RuntimeError(ï('Visualization class must inherit from BaseVisualization.'))
 
@@ -152,8 +146,10 @@ class Helipad:
 	def setup(self) -> None:
 		"""Gather the control panel settings and initialize the model. This function runs when the "New Model" button is pressed, and should not be called by user code. https://helipad.dev/functions/model/setup/"""
 		if self.hasModel: self.terminate()
+		self.spawnRNG()
 		self.doHooks('modelPreSetup', [self])
 		self.t = 0
+		self.profiler.clear()
 
 		#Blank breeds for any primitives not otherwise specified
 		for p in self.agents.values():
@@ -164,6 +160,10 @@ class Helipad:
 
 		self.data.reset()
 		for e in self.events.values(): e.reset()
+		if self.visual is not None: #Don't import the visualization module unless it's already in use
+			from helipad.visualize import TimeSeries
+			timeSeries = isinstance(self.visual, TimeSeries)
+		else: timeSeries = False
 		defPrim = 'agent' if 'agent' in self.agents else next(iter(self.agents))
 
 		def pReporter(param, item=None):
@@ -183,7 +183,7 @@ class Helipad:
 
 		if self.goods.money is not None:
 			self.data.addReporter('M0', self.data.agentReporter('stocks', 'all', good=self.goods.money, stat='sum'))
-			if isinstance(self.visual, TimeSeries) and 'money' in self.visual:
+			if timeSeries and 'money' in self.visual:
 				self.visual['money'].addSeries('M0', ï('Monetary Base'), self.goods[self.goods.money].color)
 
 		#Unconditional variables to report
@@ -193,18 +193,24 @@ class Helipad:
 		#Don't put lambda functions in here, or the variable pairs will be reported the same, for some reason.
 		for breed, b in self.agents[defPrim].breeds.items():
 			self.data.addReporter('utility-'+breed, self.data.agentReporter('utils', defPrim, breed=breed))
-			if isinstance(self.visual, TimeSeries):
+			if timeSeries:
 				self.visual['utility'].addSeries('utility-'+breed, breed.title()+' '+ï('Utility'), b.color)
 
 		if len(self.goods) >= 2:
+			def demandReporter(good: str):
+				def reporter(model):
+					v = model.goods.demand[good]
+					return int(v) if float(v).is_integer() else v #Whole quantities as ints, as on the agents
+				return reporter
 			for good, g in self.goods.nonmonetary.items():
-				self.data.addReporter('demand-'+good, self.data.agentReporter('currentDemand', 'all', good=good, stat='sum'))
-				if isinstance(self.visual, TimeSeries) and 'demand' in self.visual:
+				self.data.addReporter('demand-'+good, demandReporter(good))
+				if timeSeries and 'demand' in self.visual:
 					self.visual['demand'].addSeries('demand-'+good, good.title()+' '+ï('Demand'), g.color)
 
 		#Initialize agents
-		for prim, ags in self.agents.items():
-			ags.clear()																	#Clear any surviving agents from last run
+		self.agents.reset()																#Clear any surviving agents from last run
+		self.goods.demand = dict.fromkeys(self.goods, 0)
+		for prim in self.agents:
 			self.agents.initialize(self.param('num_'+prim), prim, self, force=True)		#Force is so we can call initialize() before instantiating hasModel
 
 		#Start progress bar
@@ -224,6 +230,8 @@ class Helipad:
 			except:
 				raise ImportError(ï('nest_asyncio is required to run Helipad from Spyder.'))
 
+		if self.profiler.active and self.profiler.reporters: self.profiler.addReporters()
+
 		self.hasModel = True
 		self.doHooks('modelPostSetup', [self])
 
@@ -239,83 +247,99 @@ class Helipad:
 
 		#Reset per-period variables
 		#Have to do this all at once at the beginning of the period, not when each agent steps
-		for p in self.agents.values():
-			for a in p: a.currentDemand = {g:0 for g in self.goods}
+		for p in self.agents.values(): p.columns.data['demand'][:] = 0
+		self.goods.demand = dict.fromkeys(self.goods, 0)
 
-		self.shocks.step()
+		with self.profiler('shocks'): self.shocks.step()
 
 		def sortFunc(model: Helipad, stage: int, func):
 			def sf(agent): return func(agent, model, stage)
 			return sf
 
 		for self.stage in range(1, self.stages+1):
-			self._cut = False
-			self.doHooks('modelStep', [self, self.stage])
-
-			#Sort agents and step them
-			for prim, agentpool in self.agents.items():
-				order = agentpool.order or self.agents.order
-				if isinstance(order, list): order = order[self.stage-1]
-				if order == 'random': shuffle(agentpool)
-
-				#Can't do our regular doHooks() here since we want to pass the function to .sort()
-				#From the user's perspective though, this doesn't matter
-				#Do the more specific sorts last
-				ordhooks = (self.hooks['order'] if 'order' in self.hooks else []) + (self.hooks[prim+'Order'] if prim+'Order' in self.hooks else [])
-				for o in ordhooks: agentpool.sort(key=sortFunc(self, self.stage, o))
-
-				#Matching model
-				if 'match' in order:
-					matchN = int(mn[1]) if len(mn := order.split('-')) > 1 else 2
-					matchpool = [a for a in agentpool if not a.dead]
-					while len(matchpool) > len(agentpool) % matchN and not self._cut:
-						agents = []
-						for a in range(matchN):
-							agent = choice(matchpool)
-							matchpool.remove(agent)
-							agents.append(agent)
-
-							#Allow selection of matches, but only on the first agent
-							if a==0:
-								others = self.doHooks('matchSelect', [agent, matchpool, self, self.stage])
+			with self.profiler(f'stage/{self.stage}'):
+				self._cut = False
+				self.doHooks('modelStep', [self, self.stage])
+
+				#Sort agents and step them
+				for prim, agentpool in self.agents.items():
+					with self.profiler(f'stage/{self.stage}/{prim}'):
+						order = agentpool.order or self.agents.order
+						if isinstance(order, list): order = order[self.stage-1]
+						if order == 'random': agentpool.shuffle(self.random)
+
+						#Can't do our regular doHooks() here since we want to pass the function to .sort()
+						#From the user's perspective though, this doesn't matter
+						#Do the more specific sorts last
+						ordhooks = (self.hooks['order'] if 'order' in self.hooks else []) + (self.hooks[prim+'Order'] if prim+'Order' in self.hooks else [])
+						for o in ordhooks: agentpool.sort(key=sortFunc(self, self.stage, o))
+
+						#Matching model
+						if 'match' in order:
+							matchN = int(mn[1]) if len(mn := order.split('-')) > 1 else 2
+							matchpool = MatchPool([a for a in agentpool if not a.dead], self.random)
+							matchHooks = (prim+'Match', 'match')
+							remainder = len(agentpool) % matchN
+							while len(matchpool) >= matchN and len(matchpool) > remainder and not self._cut:
+								agents = [matchpool.draw()]
+
+								#Allow selection of matches, but only on the first agent
+								others = self.doHooks('matchSelect', [agents[0], matchpool, self, self.stage])
 								if others is not None:
 									if (isinstance(others, baseAgent) and matchN==2): others = [others]
-									if (isinstance(others, list) and len(others)==matchN-1):
-										for other in others: matchpool.remove(other)
-										agents += others
-										break
-									else: raise ValueError(ï('matchSelect did not return the correct number of agents.'))
-
-						accept = self.doHooks('matchAccept', agents)
-						if accept is not None and not accept:
-							matchpool = agents + matchpool #Prepend agents to decrease the likelihood of a repeat matching
-							continue
-						for a in agents: agent.step(self.stage)
-						self.doHooks([prim+'Match', 'match'], [agents, prim, self, self.stage])
-
-					#Step any remainder agents
-					for agent in matchpool:
-						if not self._cut: agent.step(self.stage)
-
-				#Activation model
-				else:
-					for a in agentpool:
-						if not self._cut: a.step(self.stage)
+									if not (isinstance(others, list) and len(others)==matchN-1):
+										raise ValueError(ï('matchSelect did not return the correct number of agents.'))
+									for other in others: matchpool.remove(other)
+									agents += others
+								else: agents += [matchpool.draw() for i in range(matchN-1)]
+
+								accept = self.doHooks('matchAccept', agents)
+								if accept is not None and not accept:
+									for a in agents: matchpool.put(a)
+									continue
+								for a in agents: a.step(self.stage)
+								self.doHooks(matchHooks, [agents, prim, self, self.stage])
+
+							#Step any remainder agents
+							for agent in matchpool:
+								if not self._cut: agent.step(self.stage)
+
+						#Activation model
+						else:
+							batchHooks = primHooks(prim, 'StepBatch')
+							if self.hooks.registered(batchHooks):
+								if not self._cut: self.doHooks(batchHooks, [agentpool, self, self.stage])
+
+								#Agents only need stepping individually if something other than the age increment happens there
+								if self.hooks.registered(primHooks(prim, 'Step')) or hasattr(agentpool.class_, 'runInit') or agentpool.class_.step is not baseAgent.step:
+									for a in agentpool:
+										if not self._cut: a.step(self.stage)
+								elif self.stage == self.stages and not self._cut:
+									for a in agentpool: a.age += 1
+							else:
+								for a in agentpool:
+									if not self._cut: a.step(self.stage)
 				
-				#Add new agents, delete dead agents
-				agentpool[:] = [a for a in agentpool if not a.dead]
-				for a in self.birthqueue: self.agents[a.primitive].append(a)
-				self.birthqueue.clear()
+						#Add new agents, delete dead agents
+						if dead := agentpool.prune():
+							for a in dead: self.agents.unregister(a)
+							agentpool.columns.compact()
+						for a in self.birthqueue: self.agents[a.primitive].append(a)
+						self.birthqueue.clear()
 
 		self.data.collect(self)
-		for e in self.events.values():
-			if (not e.triggered or e.repeat) and e.check(self) and self.visual is not None and not self.visual.isNull and e.name!=self.param('stopafter'):
-				self.visual.event(self.t, **e.kwargs)
+		with self.profiler('events'):
+			for e in self.events.values():
+				if (not e.triggered or e.repeat) and e.check(self) and self.visual is not None and not self.visual.isNull and e.name!=self.param('stopafter'):
+					self.visual.event(self.t, **e.kwargs)
 		self.doHooks('modelPostStep', [self])
+		if self._autoCheckpoint and self.t % self._autoCheckpoint[1] == 0: self.checkpoint(self._autoCheckpoint[0].format(t=self.t))
+		self.profiler.step()
 		return self.t
 
 	#This is split out as an async function to allow user input while running the loop in Jupyter
 	async def run(self):
+		import asyncio #Only needed for interactive runs, and slow to import
 		if self.timer:
 			begin = time.time()
 		while self.running:
@@ -369,8 +393,32 @@ class Helipad:
 		self.running = True
 		if self.visual: self.visual.onStart()
 
-		if isNotebook(): asyncio.ensure_future(self.run()) #If Jupyter, it already has an event loop
-		else: asyncio.run(self.run())	#If Tkinter, it needs an event loop
+		if not isNotebook() and not self.cpanel and not self.timer and (self.visual is None or self.visual.isNull) and (st := self.param('stopafter')):
+			self._runSync(st)			#Nothing to listen for, so skip the event loop entirely
+		else:
+			import asyncio
+			if isNotebook(): asyncio.ensure_future(self.run()) #If Jupyter, it already has an event loop
+			else: asyncio.run(self.run())	#If Tkinter, it needs an event loop
+
+	def runHeadless(self, stopafter=None, until: str|None=None) -> None:
+		"""Run the model synchronously, without a control panel, visualization, or event loop, until a stop condition is reached. `stopafter` can be either a number of periods or the name of an event, and defaults to the value of the `stopafter` parameter. If `until` names an event, such as a convergence event, the run also stops early when it triggers. Hooks and events fire as usual. Suitable for batch runs where throughput matters more than interactivity."""
+		if stopafter is None: stopafter = self.param('stopafter')
+		if not stopafter: raise RuntimeError(ï('A headless run requires a stop condition, either a number of periods or the name of an event.'))
+
+		#Detach any registered visualization for the duration, since it won't have been launched
+		visual, self.visual = self.visual, None
+		try:
+			self.doHooks('modelStart', [self, self.hasModel])
+			if not self.hasModel: self.setup()
+			self.running = True
+			self._runSync(stopafter, until)
+		finally: self.visual = visual
+
+	#The stop condition is resolved once by the caller rather than every period as in run()
+	def _runSync(self, stopafter, until: str|None=None) -> None:
+		events = [self.events[e] for e in (stopafter, until) if isinstance(e, str)]
+		while self.running and not any(e.triggered for e in events) and (isinstance(stopafter, str) or self.t < stopafter): self.step()
+		if self.running: self.terminate()
 
 	def stop(self, *args) -> None:
 		"""Pause the model, allowing it to be subsequently resumed. https://helipad.dev/functions/model/stop/"""
@@ -405,11 +453,49 @@ class Helipad:
 
 		self.doHooks('terminate', [self, self.data.dataframe])
 
+	def transact(self, agents1, agents2, good: str, amounts, good2: str|None=None, amounts2=None) -> tuple:
+		"""Transfer `amounts` of `good` from each agent in `agents1` to the corresponding agent in `agents2` in one vectorized operation, or, if `good2` is specified, trade them for `amounts2` of `good2` and record the demand for each good, as with `baseAgent.trade()`. Either list of agents can be a single agent, and amounts can be a single number or an array. Negative amounts reverse the direction. Budget constraints are applied in order according to the `overdraft` property of the agents in `agents1`, as if the transactions were made one after another, except that goods received in the batch can't be given in the same batch. The per-transaction hooks are not run; `postTransact` runs once with arrays of the amounts transferred. Returns arrays of the amounts transferred and the shortfalls, with a column for each good if trading. https://helipad.dev/functions/model/transact/"""
+		from helipad.transact import transact
+		return transact(self, agents1, agents2, good, amounts, good2, amounts2)
+
+	def checkpoint(self, path: str) -> None:
+		"""Save the complete state of the model at the end of the current period to `path`, including agents, edges, stocks, parameters, shocks, events, collected data, model attributes set by user code, the current period, and the state of the random number generators. Hook functions are not saved; the model is resumed by running its setup code and calling `model.restore()`. Hook `modelCheckpoint` to save any other state. https://helipad.dev/functions/model/checkpoint/"""
+		from helipad.checkpoint import save
+		save(self, path)
+
+	def restore(self, path: str) -> None:
+		"""Set up the model and restore its state from a checkpoint saved with `model.checkpoint()`. The model should be constructed by the same setup code as the model that saved the checkpoint, so that its hooks, parameters, and reporters are in place. Afterward the model can be resumed with `model.start()` or `model.runHeadless()`. https://helipad.dev/functions/model/restore/"""
+		from helipad.checkpoint import load
+		load(self, path)
+
+	def fork(self, n: int, setup) -> list:
+		"""Clone the current state of the model into a list of `n` independent models, for example to apply different shocks or parameter changes after a common burn-in period. `setup` is a function that constructs and returns the model, as for `model.paramSweep()`; each branch is constructed with it and then restored from the current state, so its hooks are bound anew. Each branch draws from its own substream of the model's seed. https://helipad.dev/functions/model/fork/"""
+		if not callable(setup): raise ValueError(ï('Forking a model requires a setup function that returns a new instance of the model.'))
+		from io import BytesIO
+		from helipad.checkpoint import dump, load
+		file = BytesIO()
+		dump(self, file)
+
+		branches = []
+		for seq in self.seedSeq.spawn(n):
+			file.seek(0)
+			branch = setup()
+			load(branch, file)
+			branch.seedSeq = seq
+			branch.spawnRNG()
+			branches.append(branch)
+		return branches
+
+	def autoCheckpoint(self, path: str, every: int|None) -> None:
+		"""Checkpoint the model to `path` every `every` periods while it runs, overwriting the previous checkpoint, or stop doing so if `every` is `None`. A `{t}` in `path` is replaced with the current period, to keep each checkpoint instead. https://helipad.dev/functions/model/autocheckpoint/"""
+		self._autoCheckpoint = (path, every) if every else None
+
 	#param is a string (for a global param), a name,object,item,primitive tuple (for per-breed or per-good params), or a list of such
-	def paramSweep(self, param, reporters=None):
-		"""Repeatedly run the model while systematically varying one or more parameter values. Possible values to be swept are specified when the parameter is registered. https://helipad.dev/functions/model/paramsweep/"""
-		try: assert self.param('stopafter')
+	def paramSweep(self, param, reporters=None, replicates: int=1, seed=None, setup=None, processes: int=1, path=None, stream: bool=False, until: str|None=None, sampler: str|list='grid', budget: int|None=None):
+		"""Repeatedly run the model while systematically varying one or more parameter values. Possible values to be swept are specified when the parameter is registered. Each point is run `replicates` times, and each run is seeded deterministically from the master `seed`. With `processes>1`, runs are distributed across worker processes, each of which builds its own model from `setup`, a top-level function returning a configured `Helipad` object. If `path` is specified, each run is appended to a columnar store in that directory rather than kept in memory, and a sweep interrupted partway can be resumed by running it again with the same `path`. If `stream` is `True`, returns a generator yielding each run's results in order as they finish, rather than a list. If `until` names an event, such as one generated by `model.events.converged()`, each run ends when it triggers, with `stopafter` as the maximum length; when each run ended is recorded in its events. By default every combination of parameter values is run; to sample the space instead, set `sampler` to `'random'`, `'lhs'` (Latin hypercube), `'sobol'`, or `'halton'` and `budget` to the number of points to draw from the parameters' declared options, or pass a list of dicts of parameter values, keyed as in the results' `vars`. https://helipad.dev/functions/model/paramsweep/"""
+		try: assert (st := self.param('stopafter'))
 		except AssertionError: raise RuntimeError(ï('Can\'t do a parameter sweep without the value of the \'stopafter\' parameter set.'))
+		if processes > 1 and not callable(setup): raise ValueError(ï('A parallel parameter sweep requires a setup function to construct the model in each process.'))
 
 		#Standardize format and get the Param objects
 		if not isinstance(param, list): param = [param]
@@ -418,29 +504,43 @@ class Helipad:
 			if not isinstance(p, tuple): p = (p,)
 			pobj = self.params[p[0]]
 			params['-'.join(p)] = (p, pobj)
+		ids = {k: p[0] for k,p in params.items()}
 
 		#Generate the parameter space, a list of dicts
 		from itertools import product
-		space = [{p[0]:run[k] for k,p in enumerate(params.items())} for run in product(*[p[1].range for p in params.values()])]
+		from helipad.sweep import runPoint, runSeed, parallelSweep, SweepStore, sample
+		if isinstance(sampler, list):
+			space = [dict(point) for point in sampler]
+			if any(point.keys() != params.keys() for point in space): raise ValueError(ï('Each point in a parameter sweep must specify a value for each swept parameter.'))
+		elif sampler=='grid': space = [{p[0]:run[k] for k,p in enumerate(params.items())} for run in product(*[p[1].range for p in params.values()])]
+		elif not budget: raise ValueError(ï('Sampling a parameter sweep requires a budget of points to run.'))
+		else: space = None #Drawn once the seed is known
+
+		store = SweepStore(path) if path is not None else None
+		if store is not None: seed = store.open({'params': list(params), 'sampler': sampler if isinstance(sampler, str) else 'list', 'points': budget if space is None else len(space), 'replicates': replicates, 'seed': seed})['seed']
+		elif seed is None: seed = np.random.SeedSequence().entropy
+		if space is None: space = sample({k: p[1] for k,p in params.items()}, sampler, budget, seed)
+
+		#Skip any runs already in the store from an interrupted sweep
+		runs = [Item(n=n, vars=point, replicate=r, seed=runSeed(seed, n)) for n, (point, r) in enumerate(product(space, range(replicates)))]
+		if store is not None: runs = [run for run in runs if run.n not in store]
+		total = len(space)*replicates
 
 		#Run the model
-		alldata = []
-		for i,run in enumerate(space):
-			print('Run',str(i+1)+'/'+str(len(space))+':',', '.join([k+'='+('\''+v+'\'' if isinstance(v, str) else str(v)) for k,v in run.items()])+'…')
-			for p in self.params.values():
-				if not getattr(p, 'config', False): p.reset()
-
-			for k,v in run.items(): params[k][1].set(v, params[k][0][2] if params[k][1].per is not None else None)
-			self.setup()
-			self.start()
+		def announce(run: Item):
+			print('Run',str(run.n+1)+'/'+str(total)+':',', '.join([k+'='+('\''+v+'\'' if isinstance(v, str) else str(v)) for k,v in run.vars.items()])+(f' (replicate {run.replicate+1})' if replicates > 1 else '')+'…')
 
-			if reporters is not None: data = pandas.DataFrame({k:self.data.all[k] for k in reporters})
-			else: data = self.data.dataframe
+		def sweep():
+			if processes > 1:
+				for run, result in zip(runs, parallelSweep(setup, runs, ids, st, processes, reporters, store, until)):
+					announce(run)
+					yield result
+			else:
+				for run in runs:
+					announce(run)
+					yield runPoint(self, run, ids, st, reporters, store, until)
 
-			events = [Item(name=e.name, triggered=e.triggered, data=e.data) for e in self.events.values()]
-
-			alldata.append(Item(vars=run, data=data, events=events))
-		return alldata
+		return sweep() if stream else list(sweep())
 
 	def spatial(self, *args, **kwargs):
 		from helipad.spatial import spatialSetup
@@ -605,6 +705,7 @@ class MultiLevel(baseAgent, Helipad):
 	"""A class allowing multi-level agent-based models to be constructed, where the agents at one level are themselves full models with sub-agents. Inherits from both `baseAgent` and `Helipad`. https://helipad.dev/functions/multilevel/"""
 	def __init__(self, breed, aId, parentModel):
 		super().__init__(breed, aId, parentModel)
+		self.seed(parentModel.seedSeq.spawn(1)[0]) #Reproducible from the parent model's seed
 		self.setup()
 
 #==================
@@ -653,8 +754,30 @@ class Events(funcStore):
 		"""Register an Event. When triggered, an event stores the data output at that time and registers on the visualizer. https://helipad.dev/functions/events/add/"""
 		return super().add(name, self.Event(name, function, **kwargs))
 
+	def converged(self, reporters: str|list, window: int=50, tol: float=0.001, test: str='change'):
+		"""Generate an event trigger function that returns `True` once the values of one or more `reporters` have settled over the last `window` periods. With `test='change'`, every value in the window must lie within a relative tolerance `tol` of the window's mean. With `test='trend'`, the window's linear trend must move the reporter by less than `tol` (relative to its mean) over the window, which tolerates stationary noise. Pass the name of the event to `stopafter` or to the `until` argument of `model.paramSweep()` to end runs on convergence. https://helipad.dev/functions/events/converged/"""
+		if test not in ['change', 'trend']: raise ValueError(ï('Invalid convergence test {}.').format(test))
+		if isinstance(reporters, str): reporters = [reporters]
+		x = np.arange(window) - (window-1)/2
+
+		def trigger(model) -> bool:
+			for r in reporters:
+				y = model.data[r][-window:]
+				if len(y) < window: return False
+				y = np.asarray(y, dtype=float)
+				mean = y.mean()
+				if test=='change': dev = np.abs(y-mean).max()
+				else: dev = abs(x @ (y-mean) / (x @ x)) * (window-1)
+				if not dev < tol*(abs(mean) or 1): return False #Also catches NaN
+			return True
+		return trigger
+
 class Goods(gandb):
 	"""Interface to add and store goods that agents can own. Stored in `model.goods`. https://helipad.dev/functions/goods/"""
+	def __init__(self, model):
+		super().__init__(model)
+		self.demand: dict = {} #Total demand for each good in the current period, kept up to date as agents trade
+
 	def add(self, name: str, color, endowment=None, money: bool=False, props=None):
 		"""Register a good that agents can carry or trade. Agents keep track of stocks of the good in `agent.stocks`. Quantities of a good can then be accessed with `agent.stocks[good]`, and properties of the good with a two-argument index, e.g. `agent.stocks[good, 'property']`. https://helipad.dev/functions/goods/add/"""
 		if not props: props = {}
@@ -694,8 +817,125 @@ class Hooks(funcStore):
 	"""Interface to add and store hooks, allowing user-defined code to be inserted into the model. https://helipad.dev/functions/hooks/"""
 	multi: bool = True
 
+	def __init__(self):
+		super().__init__()
+		self.table: dict = {} #Compiled dispatch table for doHooks(), rebuilt lazily whenever the hooks change
+		self.wrap = None	#Optionally wraps each function as it's compiled, e.g. for profiling
+
+	def __setitem__(self, name: str, val):
+		super().__setitem__(name, val)
+		self.table.clear()
+
+	def __delitem__(self, name: str):
+		super().__delitem__(name)
+		self.table.clear()
+
 	def add(self, name: str, function, prioritize: bool=False):
 		"""Inserts a function into designated places in the model’s logic. See the Hooks Reference (https://helipad.dev/glossary/hooks/) for a complete list of possible hooks and the function signatures necessary to use them. This method is aliased by the `@model.hook` function decorator, which is the preferred way to hook functions. https://helipad.dev/functions/hooks/add/"""
 		if name not in self: self[name] = []
 		if prioritize: self[name].insert(0, function)
-		else: self[name].append(function)
\ No newline at end of file
+		else: self[name].append(function)
+		self.table.clear()
+
+	def remove(self, name, fname=None, removeall: bool=False):
+		"""Remove a hook, or if `fname` is specified, only the functions with that name from the hook. https://helipad.dev/functions/hooks/remove/"""
+		r = super().remove(name, fname, removeall)
+		self.table.clear()
+		return r
+
+	def clear(self):
+		super().clear()
+		self.table.clear()
+
+	def registered(self, place: str|tuple) -> bool:
+		"""Whether any functions are hooked into `place`, or into any of a tuple of fallback places."""
+		try: return bool(self.table[place])
+		except KeyError: return bool(self.compile(place))
+
+	def compile(self, place: str|tuple) -> tuple:
+		"""Resolve a hook name, or a tuple of fallback hook names, into a tuple of the function lists that `model.doHooks()` will run, omitting any with nothing registered, and store it in the dispatch table."""
+		places = place if isinstance(place, tuple) else (place,)
+		self.table[place] = tuple(tuple(self.wrap(p, f) if self.wrap else f for f in self[p]) for p in places if p in self and self[p])
+		return self.table[place]
+
+class Profiler:
+	"""Times the components of each model period while active: each stage, each primitive's step loop within a stage, each registered hook function, each reporter, shocks, and event checks. Timings are nested, so for example a primitive's step loop includes the time spent in its `agentStep` hooks. Stored in `model.profiler`."""
+	def __init__(self, model):
+		self.model = model
+		self.active: bool = False
+		self.reporters: bool = False
+		self.period: dict = {}
+		self.history: list = []
+
+	def __repr__(self): return f'<{self.__class__.__name__}: {"active" if self.active else "inactive"}, {len(self.history)} periods>'
+
+	def start(self, reporters: bool=False) -> None:
+		"""Begin profiling the model. If `reporters` is `True`, each timing known at setup is also recorded as a `profile/`-prefixed reporter, for plotting or export along with the rest of the model's data; these include timings up to data collection in each period. Reporters require the profiler to be started before the model is set up."""
+		if reporters and self.model.hasModel: raise RuntimeError(ï('Profiler reporters must be enabled before the model is set up.'))
+		self.active, self.reporters = True, reporters
+		self.model.hooks.wrap = self.wrapHook
+		self.model.hooks.table.clear()
+
+	def stop(self) -> None:
+		"""Stop profiling. Collected timings remain available until the next model setup."""
+		self.active = False
+		self.model.hooks.wrap = None
+		self.model.hooks.table.clear()
+
+	def clear(self) -> None:
+		"""Discard collected timings."""
+		self.period = {}
+		self.history.clear()
+
+	@contextmanager
+	def __call__(self, key: str):
+		"""A context manager that adds the time spent inside it to `key` in the current period, or does nothing if the profiler is inactive."""
+		if not self.active:
+			yield
+			return
+		begin = time.perf_counter()
+		try: yield
+		finally: self.add(key, time.perf_counter() - begin)
+
+	def add(self, key: str, secs: float) -> None:
+		"""Add `secs` seconds to `key` in the current period."""
+		self.period[key] = self.period.get(key, 0) + secs
+
+	def wrapHook(self, place: str, function):
+		"""Wrap a hook function so that its run time is recorded under `hook/place/function`."""
+		key = f'hook/{place}/{function.__name__}'
+		def timed(*args):
+			begin = time.perf_counter()
+			try: return function(*args)
+			finally: self.add(key, time.perf_counter() - begin)
+		return timed
+
+	def step(self) -> None:
+		"""Close out the timings for the current period. Called automatically at the end of `model.step()`."""
+		if not self.active: return
+		self.period['t'] = self.model.t
+		self.history.append(self.period)
+		self.period = {}
+
+	def addReporters(self) -> None:
+		"""Register a reporter for each timing that can be known at setup. Called from `model.setup()` if the profiler was started with `reporters=True`."""
+		model = self.model
+		keys = ['shocks'] + [f'stage/{s}' for s in range(1, model.stages+1)] + [f'stage/{s}/{p}' for s in range(1, model.stages+1) for p in model.agents]
+		keys += ['reporter/'+r for r in model.data.reporters if not r.startswith('profile/')]
+		keys += [f'hook/{h}/{f.__name__}' for h, fns in model.hooks.items() for f in fns]
+
+		def reporter(key):
+			def r(model): return self.period.get(key, 0)
+			return r
+		for k in keys: model.data.addReporter('profile/'+k, reporter(k))
+
+	@property
+	def dataframe(self):
+		"""A `Pandas` dataframe with a row for each period profiled and a column for each timing, in seconds."""
+		import pandas
+		return pandas.DataFrame(self.history).set_index('t').fillna(0) if self.history else pandas.DataFrame()
+
+	@property
+	def summary(self):
+		"""A `Pandas` series with the total time spent on each component over the profiled periods, in descending order."""
+		return self.dataframe.sum().sort_values(ascending=False)
\ No newline at end of file
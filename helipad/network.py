@@ -0,0 +1,156 @@
+"""
+Random graph generators and sparse-matrix representations of the networks among agents, with graph queries that don't go through NetworkX. This module should not be imported directly; use `model.agents.createNetwork()` and related methods, or `model.agents.adjacency()`, instead. See https://helipad.dev/functions/agents/adjacency/
+"""
+
+import numpy as np
+from helipad.helpers import ï
+
+#==================
+# GENERATORS
+# Each returns an (edges × 2) array of agent positions, with work proportional to the number of edges
+#==================
+
+def gnp(rng: np.random.Generator, total: int, p: float) -> np.ndarray:
+	"""Sample each of `total` slots independently with probability `p`, returning the sorted indices of those selected. Skips ahead by geometrically distributed gaps rather than drawing for every slot."""
+	if p <= 0 or total <= 0: return np.empty(0, dtype=np.int64)
+	if p >= 1: return np.arange(total, dtype=np.int64)
+	found, pos = [], -1
+	while pos < total:
+		n = int(total*p + 5*np.sqrt(total*p) + 16) #Enough draws to usually finish in one batch
+		idx = pos + np.cumsum(rng.geometric(p, n))
+		found.append(idx)
+		pos = idx[-1]
+	idx = np.concatenate(found)
+	return idx[idx < total]
+
+#Map indices into the lower triangle of an n×n matrix, row by row, to (row, column) pairs with column < row
+def triangle(k: np.ndarray) -> np.ndarray:
+	v = ((1 + np.sqrt(1 + 8*k.astype(float)))//2).astype(np.int64)
+	v -= v*(v-1)//2 > k #Correct for rounding in the square root
+	v += (v+1)*v//2 <= k
+	return np.column_stack((k - v*(v-1)//2, v))
+
+def erdosRenyi(rng: np.random.Generator, n: int, p: float) -> np.ndarray:
+	"""Each of the n(n-1)/2 possible undirected edges among `n` nodes, with probability `p`."""
+	return triangle(gnp(rng, n*(n-1)//2, p))
+
+def stochasticBlock(rng: np.random.Generator, blocks: list[np.ndarray], densities: np.ndarray) -> np.ndarray:
+	"""Random undirected edges among nodes partitioned into `blocks`, arrays of node positions, with the probability of an edge between nodes in blocks i and j given by `densities[i,j]`."""
+	pairs = [np.empty((0,2), dtype=np.int64)]
+	for i, bi in enumerate(blocks):
+		for j, bj in enumerate(blocks[:i+1]):
+			if i==j: pairs.append(bi[erdosRenyi(rng, len(bi), densities[i,i])])
+			else:
+				k = gnp(rng, len(bi)*len(bj), densities[i,j])
+				pairs.append(np.column_stack((bi[k//len(bj)], bj[k%len(bj)])))
+	return np.concatenate(pairs)
+
+def barabasiAlbert(rng: np.random.Generator, n: int, m: int) -> np.ndarray:
+	"""Preferential attachment: each node after the first `m` connects to `m` distinct earlier nodes, chosen with probability proportional to their degree."""
+	if not 1 <= m < n: raise ValueError(ï('Each new node must connect to at least 1 and fewer than {} nodes.').format(n))
+	pairs = np.empty(((n-m)*m, 2), dtype=np.int64)
+	repeated = np.empty(2*(n-m)*m, dtype=np.int64) #Each node appears once for each edge it has, so a uniform draw from it is proportional to degree
+	targets, r = list(range(m)), 0
+	for e, source in enumerate(range(m, n)):
+		pairs[e*m:(e+1)*m, 0], pairs[e*m:(e+1)*m, 1] = source, targets
+		repeated[r:r+m], repeated[r+m:r+2*m] = targets, source
+		r += 2*m
+		chosen = set()
+		while len(chosen) < m: chosen.update(repeated[rng.integers(0, r, m-len(chosen))].tolist())
+		targets = list(chosen)
+	return pairs
+
+def wattsStrogatz(rng: np.random.Generator, n: int, k: int, p: float) -> np.ndarray:
+	"""A ring lattice in which each node is connected to its `k` nearest neighbors, with each edge rewired to a random node with probability `p`, avoiding self-loops and duplicate edges."""
+	if k%2 or not 0 < k < n: raise ValueError(ï('Neighbors must be an even number less than the number of nodes.'))
+	nodes = np.arange(n, dtype=np.int64)
+	pairs = np.concatenate([np.column_stack((nodes, (nodes+j)%n)) for j in range(1, k//2+1)])
+	rewire = np.flatnonzero(rng.random(len(pairs)) < p)
+	if len(rewire):
+		existing = set(zip(*np.sort(pairs, axis=1).T.tolist()))
+		degree = [k]*n
+		for e in rewire.tolist():
+			u, v = pairs[e].tolist()
+			if degree[u] >= n-1: continue #Already connected to every other node
+			w = int(rng.integers(n))
+			while w==u or (min(u,w), max(u,w)) in existing: w = int(rng.integers(n))
+			existing.discard((min(u,v), max(u,v)))
+			existing.add((min(u,w), max(u,w)))
+			degree[v] -= 1
+			degree[w] += 1
+			pairs[e, 1] = w
+	return pairs
+
+def configuration(rng: np.random.Generator, degrees) -> np.ndarray:
+	"""Random undirected edges with each node `i` having degree `degrees[i]`, by pairing off edge stubs at random. Self-loops and parallel edges may occur, as in the standard configuration model."""
+	degrees = np.asarray(degrees, dtype=np.int64)
+	if (degrees < 0).any() or degrees.sum()%2: raise ValueError(ï('Degrees must be nonnegative and sum to an even number.'))
+	stubs = np.repeat(np.arange(len(degrees), dtype=np.int64), degrees)
+	rng.shuffle(stubs)
+	return stubs.reshape(-1, 2)
+
+#==================
+# SPARSE MATRICES
+#==================
+
+class Adjacency:
+	"""A network among agents as a sparse adjacency matrix in CSR format, with rows and columns corresponding to agents. Entry (i,j) is the weight of the edge from agent `ids[i]` to agent `ids[j]`, or 1 if unweighted. Undirected edges are stored in both directions. Returned by `Agents.adjacency()`. https://helipad.dev/functions/adjacency/"""
+	def __init__(self, matrix, ids: np.ndarray):
+		self.matrix = matrix
+		self.ids = ids #The agent ID of each row
+		self.index = {aId: i for i, aId in enumerate(ids.tolist())} #The row of each agent ID
+
+	def __len__(self) -> int: return len(self.ids)
+	def __repr__(self): return f'<{self.__class__.__name__}: {len(self.ids)} agents, {self.matrix.nnz} entries>'
+
+	@classmethod
+	def fromEdges(cls, agents: list, edges: list, weighted: bool=True):
+		"""Build the matrix among `agents` from a list of `Edge` objects. Edges with a vertex not among `agents` are skipped."""
+		try: from scipy import sparse
+		except ImportError: raise ImportError(ï('scipy is required for sparse network matrices.'))
+		index = {a.id: i for i,a in enumerate(agents)}
+		src, dst, wt = [], [], []
+		for e in edges:
+			v0, v1 = (e.startpoint, e.endpoint) if e.directed else e.vertices
+			if (i := index.get(v0.id)) is None or (j := index.get(v1.id)) is None: continue
+			w = e.weight if weighted else 1
+			src.append(i); dst.append(j); wt.append(w)
+			if not e.directed and i!=j: src.append(j); dst.append(i); wt.append(w)
+
+		n = len(agents)
+		matrix = sparse.csr_array((np.array(wt, dtype=float), (np.array(src, dtype=np.intp), np.array(dst, dtype=np.intp))), shape=(n, n))
+		matrix.sum_duplicates()
+		if not weighted: matrix.data[:] = 1 #Parallel edges count once
+		return cls(matrix, np.fromiter((a.id for a in agents), dtype=np.int64, count=n))
+
+	def degree(self, direction: str='out', weighted: bool=False) -> np.ndarray:
+		"""The number of connections of each agent, in row order, or the sum of their weights if `weighted` is `True`. `direction` can be `'out'` or `'in'`; for undirected edges these are the same. https://helipad.dev/functions/adjacency/degree/"""
+		if direction not in ('out', 'in'): raise ValueError(ï('Direction must be either \'out\' or \'in\'.'))
+		if weighted: return np.asarray(self.matrix.sum(axis=1 if direction=='out' else 0)).ravel()
+		if direction=='out': return np.diff(self.matrix.indptr)
+		return np.bincount(self.matrix.indices, minlength=len(self.ids))
+
+	def components(self, strong: bool=False) -> list[np.ndarray]:
+		"""Arrays of the agent IDs in each connected component, largest first. Directed edges are treated as undirected unless `strong` is `True`. https://helipad.dev/functions/adjacency/components/"""
+		from scipy.sparse import csgraph
+		n, labels = csgraph.connected_components(self.matrix, directed=True, connection='strong' if strong else 'weak')
+		order = np.argsort(labels, kind='stable')
+		groups = np.split(self.ids[order], np.cumsum(np.bincount(labels, minlength=n))[:-1])
+		return sorted(groups, key=len, reverse=True)
+
+	def bfs(self, source: int, depth: int|None=None) -> dict:
+		"""A breadth-first search along outbound and undirected edges from the agent with ID `source`. Returns a `dict` of the ID of each agent reached, in order of discovery, and its distance in steps. `depth`, if specified, limits the number of steps. https://helipad.dev/functions/adjacency/bfs/"""
+		if source not in self.index: raise KeyError(ï('Agent {} is not in the network.').format(source))
+		dist = np.full(len(self.ids), -1, dtype=np.intp)
+		frontier = np.array([self.index[source]], dtype=np.intp)
+		dist[frontier] = 0
+		found, d = [frontier], 0
+		while len(frontier) and (depth is None or d < depth):
+			d += 1
+			nbrs = self.matrix[frontier].indices #Columns of the frontier's rows
+			nbrs = np.unique(nbrs[dist[nbrs] < 0])
+			dist[nbrs] = d
+			found.append(nbrs)
+			frontier = nbrs
+		rows = np.concatenate(found)
+		return dict(zip(self.ids[rows].tolist(), dist[rows].tolist()))
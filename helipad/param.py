@@ -3,7 +3,7 @@ Classes to abstract the interface between model parameters and GUI elements. Thi
 """
 
 from itertools import combinations
-from numpy import arange, random
+from numpy import arange
 from helipad.helpers import warnings, ï, isNotebook, Item, funcStore
 
 class Param(Item):
@@ -188,6 +188,7 @@ class SliderParam(Param):
 
 	@property
 	def range(self) -> list:
+		if isinstance(self.opts, list): return list(self.opts) #Log slider
 		values = arange(self.opts['low'], self.opts['high'], self.opts['step']).tolist()
 		values.append(self.opts['high']) #arange doesn't include the high
 		return values
@@ -645,7 +646,7 @@ class Shocks(CheckgridParam, fStoreWithInterface):
 	def randn(self, n):
 		"""Generate a timer function that returns `True` with `n`% probability each period. https://helipad.dev/functions/shocks/randn/"""
 		if n<0 or n>100: raise ValueError(ï('randn() argument must be between 0 and 100.'))
-		def fn(t): return random.randint(0,100) < n
+		def fn(t): return self.model.rng.integers(0,100) < n
 		return fn
 
 	def atperiod(self, n):
@@ -3,11 +3,10 @@ Functions and classes to initialize a network of Patch agents and add orientatio
 """
 
 import warnings
-from random import uniform
 from math import sqrt, sin, cos, atan2, pi, copysign, floor
 from abc import ABC, abstractmethod
 from numbers import Number
-from helipad.agent import Patch, baseAgent
+from helipad.agent import Patch, baseAgent, primHooks
 from helipad.visualize import Charts
 from helipad.helpers import ï, Item
 
@@ -34,13 +33,13 @@ def spatialSetup(model, dim=10, corners=False, geometry: str='rect', offmap: boo
 	@model.hook(prioritize=True)
 	def baseAgentInit(agent, model):
 		if agent.primitive == 'patch': return #Patch position is fixed
-		p = model.doHooks(['baseAgentPosition', agent.primitive+'Position'], [agent, agent.model])
+		p = model.doHooks(primHooks(agent.primitive, 'Position'), [agent, agent.model])
 		if p and len(p) >= 2:
 			agent.position = list(p)
 			if not offmap and not agent.patch: raise ValueError(ï('Agent is not on a patch.'))
 		else:
 			while not offmap and not agent.patch:
-				agent.position = [uniform(*model.patches.boundaries[0]), uniform(*model.patches.boundaries[1])]
+				agent.position = [model.random.uniform(*model.patches.boundaries[0]), model.random.uniform(*model.patches.boundaries[1])]
 
 	#MOVEMENT AND POSITION
 
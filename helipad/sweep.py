@@ -0,0 +1,144 @@
+"""
+Functions to run the individual points of a parameter sweep, either in the current process or distributed across a pool of worker processes, and a columnar on-disk store for the results. This module should not be imported directly; use `model.paramSweep()` instead. See https://helipad.dev/functions/model/paramsweep/
+"""
+
+import os, json, random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas, numpy as np
+from helipad.helpers import ï, Item
+
+def runSeed(seed: int, n: int) -> int:
+	"""Derive the seed for run `n` of a sweep from the sweep's master seed. Runs get statistically independent streams, and the same master seed always produces the same run seeds."""
+	return int(np.random.SeedSequence(seed, spawn_key=(n,)).generate_state(1)[0])
+
+def dimensions(param) -> int:
+	"""The number of dimensions a parameter occupies in the unit hypercube: one per checkbox for a checkgrid, and one otherwise."""
+	if param.type=='checkgrid': return len(param.pKeys)
+	if param.range is None: raise ValueError(ï('Parameter {} cannot be sampled.').format(param.name))
+	return 1
+
+def fromUnit(param, u):
+	"""Map a point in the unit interval (or an array of them, for a checkgrid) onto a value within the parameter's declared options."""
+	if param.type=='checkgrid': return [k for k,x in zip(param.pKeys, u) if x >= 0.5]
+	if param.type=='slider' and isinstance(param.opts, dict):
+		low, high, step = param.opts['low'], param.opts['high'], param.opts['step']
+		steps = round((high-low)/step)
+		return round(low + min(int(u*(steps+1)), steps)*step, 10) #Snap to the slider's step, keeping the endpoints as likely as any other value
+	values = list(param.range)
+	return values[min(int(u*len(values)), len(values)-1)]
+
+def sample(params: dict, sampler: str, n: int, seed) -> list:
+	"""Draw `n` points from the space of `params`, a dict of parameter keys and `Param` objects, as a list of dicts. `sampler` is one of `'random'`, `'lhs'` (Latin hypercube), `'sobol'`, or `'halton'`, and the draw is reproducible from `seed`."""
+	dims = {k: dimensions(p) for k,p in params.items()}
+	d = sum(dims.values())
+	rng = np.random.default_rng(np.random.SeedSequence(seed))
+
+	if sampler=='random': u = rng.random((n, d))
+	elif sampler=='lhs': u = (rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T + rng.random((n, d))) / n
+	elif sampler in ['sobol', 'halton']:
+		try: from scipy.stats import qmc
+		except ImportError: raise ImportError(ï('scipy is required for Sobol and Halton sampling.'))
+		u = (qmc.Sobol if sampler=='sobol' else qmc.Halton)(d, scramble=True, seed=rng).random(n)
+	else: raise ValueError(ï('Invalid sampler {}.').format(sampler))
+
+	points = []
+	for row in u:
+		point, i = {}, 0
+		for k,p in params.items():
+			point[k] = fromUnit(p, row[i:i+dims[k]] if p.type=='checkgrid' else row[i])
+			i += dims[k]
+		points.append(point)
+	return points
+
+def runPoint(model, run: Item, ids: dict, stopafter, reporters=None, store=None, until=None) -> Item:
+	"""Run `model` once at a single point of the parameter space and return an `Item` with the parameter values (`vars`), the replicate number and seed, the data (`data`), and the event triggers (`events`). If `store` is specified, the data is written to it and `data` holds the filename instead."""
+	for p in model.params.values():
+		if not getattr(p, 'config', False): p.reset()
+	model.param('stopafter', stopafter)
+	for k,v in run.vars.items(): model.param(ids[k], v)
+	model.seed(run.seed)
+
+	#Seed the global generators for hook code still drawing from them, restoring the caller's state afterward
+	state = random.getstate(), np.random.get_state()
+	random.seed(run.seed)
+	np.random.seed(run.seed)
+	try:
+		model.setup()
+		model.runHeadless(stopafter, until)
+	finally:
+		random.setstate(state[0])
+		np.random.set_state(state[1])
+
+	if reporters is not None: data = pandas.DataFrame({k:model.data.all[k] for k in reporters})
+	else: data = model.data.dataframe
+	events = [Item(name=e.name, triggered=e.triggered, data=e.data) for e in model.events.values()]
+	if store is not None: data = store.write(run, data, events)
+
+	return Item(vars=run.vars, replicate=run.replicate, seed=run.seed, data=data, events=events)
+
+#Each worker process builds its model once and reuses it for every run it receives, as a sequential sweep does
+workerModel = None
+def initWorker(setup):
+	global workerModel
+	os.environ['HELIPAD_NO_UPDATE_CHECK'] = '1'
+	workerModel = setup()
+
+def runInWorker(*args) -> Item: return runPoint(workerModel, *args)
+
+def parallelSweep(setup, runs: list, ids: dict, stopafter, processes: int, reporters=None, store=None, until=None):
+	"""Distribute `runs` across `processes` worker processes, each of which constructs its own model by calling `setup()`, and yield the results in order as they become available. `setup` must be picklable, i.e. defined at the top level of a module."""
+	with ProcessPoolExecutor(processes, initializer=initWorker, initargs=(setup,)) as pool:
+		queue = deque() #Bound the number of runs in flight so finished results don't pile up in memory
+		for run in runs:
+			queue.append(pool.submit(runInWorker, run, ids, stopafter, reporters, store, until))
+			if len(queue) >= 2*processes: yield queue.popleft().result()
+		while queue: yield queue.popleft().result()
+
+class SweepStore:
+	"""An on-disk columnar store for parameter sweep results, with one Parquet file per finished run. Each file holds the run's reporter columns along with its parameter values, replicate, seed, and a boolean column per event marking the periods in which it triggered. The whole store can be read back as a single dataframe with `SweepStore.load()`. Requires `pyarrow`."""
+	def __init__(self, path: str):
+		try: import pyarrow
+		except ImportError: raise ImportError(ï('pyarrow is required to write parameter sweep results to disk.'))
+		self.path = path
+		os.makedirs(path, exist_ok=True)
+
+	def __repr__(self): return f'<{self.__class__.__name__}: {self.path}>'
+	def __contains__(self, n: int) -> bool: return os.path.isfile(self.file(n))
+
+	def file(self, n: int) -> str:
+		"""The filename holding the results of run `n`."""
+		return os.path.join(self.path, f'run-{n:06d}.parquet')
+
+	def open(self, meta: dict) -> dict:
+		"""Record the sweep's configuration, or if resuming an existing sweep, check that it matches and return the recorded configuration (including the master seed)."""
+		file = os.path.join(self.path, '_sweep.json') #Underscore so it's skipped when reading the directory as a dataset
+		if os.path.isfile(file):
+			with open(file) as f: old = json.load(f)
+			if any(old.get(k) != meta[k] for k in meta if k!='seed' or meta[k] is not None):
+				raise ValueError(ï('The parameter sweep does not match the one already stored in {}.').format(self.path))
+			return old
+		if meta['seed'] is None: meta['seed'] = np.random.SeedSequence().entropy
+		with open(file, 'w') as f: json.dump(meta, f)
+		return meta
+
+	def write(self, run: Item, data, events: list) -> str:
+		"""Append a finished run to the store and return the filename."""
+		data = data.copy()
+		data.insert(0, 't', range(1, len(data)+1))
+		meta = {'run': run.n, 'replicate': run.replicate, 'seed': run.seed} | {k:v for k,v in run.vars.items() if k not in data}
+		for i, (k,v) in enumerate(meta.items()): data.insert(i, k, [v]*len(data))
+		for e in events:
+			triggered = e.triggered if isinstance(e.triggered, list) else [e.triggered] if e.triggered is not False else []
+			data['event-'+e.name] = data['t'].isin(triggered)
+
+		#Write to a hidden file first, so an interrupted write doesn't leave a partial run in the store
+		file = self.file(run.n)
+		tmp = os.path.join(self.path, '.'+os.path.basename(file))
+		data.to_parquet(tmp, index=False)
+		os.replace(tmp, file)
+		return file
+
+	def load(self, columns=None):
+		"""Read the stored runs into a single `Pandas` dataframe, optionally restricted to a list of `columns`."""
+		return pandas.read_parquet(self.path, columns=columns)
@@ -0,0 +1,146 @@
+"""
+Vectorized transfers and trades among arrays of agents. This module should not be imported directly; use `model.transact()` instead. See https://helipad.dev/functions/model/transact/
+"""
+
+import warnings
+import numpy as np
+from helipad.helpers import ï
+from helipad.agent import baseAgent, Primitive
+
+class Cells:
+	"""The rows of a single agent, a primitive, or a list of agents in the matrices holding their goods and current demand, grouped by matrix so they can be read and written with array operations. `bases` numbers the rows of each matrix so that an agent gets the same key in every `Cells` object sharing it."""
+	def __init__(self, agents, n: int, bases: dict):
+		self.n = n
+		if isinstance(agents, baseAgent): groups = [(agents, np.arange(n, dtype=np.intp), None)]
+		elif isinstance(agents, Primitive): groups = [(agents[0], np.arange(n, dtype=np.intp), agents.columns.rows(agents))] if n else []
+		else:
+			found = {}
+			for i,a in enumerate(agents):
+				if (g := found.get(id(a.stocks.m))) is None: g = found[id(a.stocks.m)] = (a, [], [])
+				g[1].append(i)
+				g[2].append(a.stocks.row)
+			groups = [(a, np.array(pos, dtype=np.intp), np.array(rows, dtype=np.intp)) for a, pos, rows in found.values()]
+
+		#Each group holds the stocks matrix, the column of each good, positions in the list, rows in the matrix, and the demand matrix if any
+		self.groups, self.keys = [], np.empty(n, dtype=np.int64)
+		for a, pos, rows in groups:
+			m = a.stocks.m
+			if rows is None: rows = np.full(len(pos), a.stocks.row, dtype=np.intp)
+			demand = a._columns.data['demand'] if a._columns is not None and 'demand' in a._columns and a._columns.data['stocks'] is m else None
+			self.groups.append((m, a.stocks.index, pos, rows, demand, agents if demand is None else None))
+			if id(m) not in bases:
+				bases[id(m)] = bases.get(None, 0)
+				bases[None] = bases[id(m)] + len(m)
+			self.keys[pos] = bases[id(m)] + rows
+
+	def get(self, good: str) -> np.ndarray:
+		values = np.zeros(self.n)
+		for m, index, pos, rows, *_ in self.groups: values[pos] = m[rows, index[good]]
+		return values
+
+	#Repeated agents accumulate in order, as with successive individual transactions
+	def add(self, good: str, values: np.ndarray):
+		for m, index, pos, rows, *_ in self.groups: np.add.at(m, (rows, index[good]), values[pos])
+
+	def addDemand(self, model, good: str, values: np.ndarray):
+		"""Add to the current demand of each agent and to the model's totals, through the demand matrices where possible."""
+		for m, index, pos, rows, demand, agents in self.groups:
+			v = values[pos]
+			if demand is not None:
+				np.add.at(demand, (rows, index[good]), v)
+				model.goods.demand[good] += v.sum()
+			else:
+				for i, q in zip(pos.tolist(), v.tolist()):
+					if q: (agents if isinstance(agents, baseAgent) else agents[i]).currentDemand[good] += q
+
+#The total of q over each agent's earlier transactions in the batch
+def prior(keys: np.ndarray, q: np.ndarray) -> np.ndarray:
+	order = np.argsort(keys, kind='stable')
+	k, qs = keys[order], q[order]
+	excl = np.cumsum(qs) - qs
+	starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+	excl -= np.repeat(excl[starts], np.diff(np.r_[starts, len(k)]))
+	out = np.empty_like(excl)
+	out[order] = excl
+	return out
+
+#The giving agent, its holdings at the start of the batch, and the quantity given, for each transaction of `good`
+#from side1 to side2, or the reverse if the amount is negative
+def leg(side1: Cells, side2: Cells, good: str, amounts: np.ndarray) -> tuple:
+	gives1 = amounts >= 0
+	return np.where(gives1, side1.keys, side2.keys), np.where(gives1, side1.get(good), side2.get(good)), np.abs(amounts)
+
+#The fraction of each transaction the giver can cover with its holdings, net of what it gives in its earlier transactions in the batch
+def coverage(keys: np.ndarray, held: np.ndarray, q: np.ndarray) -> np.ndarray:
+	available = np.clip(held - prior(keys, q), 0, None)
+	with np.errstate(divide='ignore', invalid='ignore'): return np.where(q > available, available/q, 1)
+
+#The fraction of each transaction that goes through, run in order for givers that come up short, since a transaction
+#that's scaled down or cancelled leaves more of the giver's holdings for its later ones. `partial` marks the transactions
+#that can go through in part; the others are cancelled if they can't be covered.
+def replay(legs: list, short: np.ndarray, partial: np.ndarray) -> np.ndarray:
+	scale = np.ones(len(short))
+	risky = np.zeros(len(short), dtype=bool)
+	for keys, held, q in legs: risky |= np.isin(keys, keys[short])
+	remaining = {} #By leg and agent, since each leg is a different good
+	for t in np.flatnonzero(risky).tolist():
+		need = [((l, keys[t]), held[t], q[t]) for l, (keys, held, q) in enumerate(legs)]
+		s = min((min(remaining.get(k, h), q)/q if q > 0 else 1) for k, h, q in need)
+		if s < 1 and not partial[t]: s = 0
+		scale[t] = s
+		for k, h, q in need: remaining[k] = remaining.get(k, h) - s*q
+	return scale
+
+def transact(model, agents1, agents2, good: str, amounts, good2: str|None=None, amounts2=None) -> tuple:
+	#A single agent or amount applies to every transaction
+	seqs = [x for x in (agents1, agents2, amounts, amounts2) if isinstance(x, (list, tuple, np.ndarray))]
+	n = len(seqs[0]) if seqs else 1
+	agents1, agents2 = [a if isinstance(a, (baseAgent, Primitive)) else list(a) if isinstance(a, (tuple, np.ndarray)) else a for a in (agents1, agents2)]
+	if any(len(x) != n for x in seqs): raise ValueError(ï('Agents and amounts must be the same length.'))
+	req1 = np.broadcast_to(np.asarray(amounts, dtype=float), (n,))
+	req2 = np.broadcast_to(np.asarray(amounts2, dtype=float), (n,)) if good2 is not None else None
+	amt1, amt2 = req1, req2
+	bases = {}
+	side1, side2 = Cells(agents1, n, bases), Cells(agents2, n, bases)
+
+	#Budget constraints, using the overdraft policy of the first agent in each transaction.
+	#Scale each transaction down to what the givers can cover, holding the price constant, or cancel it.
+	if isinstance(agents1, baseAgent): policies = np.full(n, agents1.overdraft)
+	else: policies = np.array([a.overdraft for a in agents1], dtype=str) if n else np.empty(0, dtype=str)
+	constrained = policies != 'allow'
+	if constrained.any():
+		legs = [leg(side1, side2, good, req1)] + ([leg(side2, side1, good2, req2)] if good2 is not None else [])
+		covers = [coverage(*l) for l in legs]
+		cover = np.minimum.reduce(covers)
+		short = constrained & (cover < 1)
+		if short.any():
+			if (stop := short & (policies=='stop')).any():
+				i = int(np.flatnonzero(stop)[0])
+				a1, a2 = [a if isinstance(a, baseAgent) else a[i] for a in (agents1, agents2)]
+				raise ValueError(ï('{0} {1} does not have sufficient {2} to give {3} {4}.').format(a1.primitive.title(), a1.id, good, a2.primitive.title(), a2.id))
+			fail = np.char.find(policies, 'fail') >= 0
+			#Scaling down is already exact if only one good runs short, since then the other can't bind
+			if not (fail & short).any() and sum((constrained & (c < 1)).any() for c in covers) <= 1: scale = np.where(short, cover, 1)
+			else: scale = np.where(constrained, replay(legs, short, ~fail), 1)
+			amt1 = req1 * scale
+			if good2 is not None: amt2 = req2 * scale
+			if (warn := short & (np.char.find(policies, 'warn') >= 0)).any():
+				message = ï('{0} of {1} transactions exceeded the available holdings.').format(int(warn.sum()), n)
+				message += ï(' Cancelling trade…') if fail[warn].all() else ''
+				warnings.warn(message, None, 3)
+
+	side1.add(good, -amt1)
+	side2.add(good, amt1)
+	if good2 is not None:
+		side1.add(good2, amt2)
+		side2.add(good2, -amt2)
+
+		#The recipient of each good demands it
+		side1.addDemand(model, good, np.clip(-amt1, 0, None))
+		side2.addDemand(model, good, np.clip(amt1, 0, None))
+		side1.addDemand(model, good2, np.clip(amt2, 0, None))
+		side2.addDemand(model, good2, np.clip(-amt2, 0, None))
+
+	model.doHooks('postTransact', [agents1, agents2, good, amt1, good2, amt2, model])
+	if good2 is None: return amt1.copy(), req1 - amt1
+	return np.column_stack((amt1, amt2)), np.column_stack((req1 - amt1, req2 - amt2))
@@ -46,7 +46,7 @@ class CES(Utility):
 	def __init__(self, goods, elast):
 		if isinstance(goods, dict):
 			self.coeffs = goods
-			goods = goods.keys()
+			goods = list(goods) #Not a keys view, so utility objects can be pickled
 		else:
 			self.coeffs = {g:1 for g in goods}
 		super().__init__(goods)
@@ -802,7 +802,7 @@ class AgentsPlot(ChartPlot):
 		if self.params['agentSize'] and type(self.params['agentSize']) not in [int, float]: capture['size'] = self.params['agentSize']
 		if self.scatter:
 			for v in self.scatter: capture[v] = v
-		agents = {a.id:a for a in (self.viz.model.agents[self.prim] if self.prim else self.viz.model.agents.all)}
+		agents = self.viz.model.agents.index
 		for k,v in capture.items():
 			if 'good:' in v:
 				for n in G.nodes: G.nodes[n][k] = agents[n].stocks[v.split(':')[1]]
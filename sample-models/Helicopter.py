@@ -40,13 +40,12 @@ class Store(baseAgent):
 		if self.wage * N > self.balance: self.wage = self.balance / N 	#Budget constraint
 
 		#Hire labor, with individualized wage shocks
-		labor = 0
-		for a in self.model.agents['agent']:
-			self.wage = max(self.wage, 0)
-			wage = random.normal(self.wage, self.wage/2 + 0.1)	#Can't have zero stdev
-			wage = max(wage, 0)									#Wage bounded from below by 0
-			self.pay(a, wage)
-			labor += 1
+		workers = self.model.agents['agent']
+		self.wage = max(self.wage, 0)
+		wages = random.normal(self.wage, self.wage/2 + 0.1, len(workers))	#Can't have zero stdev
+		wages = wages.clip(0)												#Wage bounded from below by 0
+		self.model.transact(self, workers, self.model.goods.money, wages)
+		labor = len(workers)
 
 		tPrice = sum(self.price[good] for good in self.model.goods.nonmonetary)
 		avg, stdev = {},{} #Hang onto these for use with credit calculations